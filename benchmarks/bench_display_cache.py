@@ -0,0 +1,95 @@
+"""
+Microbenchmark for PandasModel.data() repaint cost.
+
+Sweeps a scrolling viewport over a 10k-row sheet and asks the model for every
+visible cell, once with the display-string cache and once with the old
+``str(self._data.iloc[row, col])`` lookup.
+
+Run from the repository root:
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_display_cache.py
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import QCoreApplication, Qt
+
+from poresamplespandas.models.pandas_model import PandasModel
+
+
+class UncachedPandasModel(PandasModel):
+    """PandasModel with the pre-cache display lookup"""
+
+    def data(self, index, role=Qt.ItemDataRole):
+        if role == Qt.DisplayRole:
+            return str(self._data.iloc[index.row(), index.column()])
+        return super().data(index, role)
+
+
+def make_sheet(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(
+        {
+            "sample_id": [f"21COR{i:06d}" for i in rng.permutation(rows)],
+            "order": 0,
+            "age": rng.integers(1, 100, rows).astype(float),
+            "barcodes": " ",
+            "kit": " ",
+            "comment": " ",
+        }
+    )
+
+
+def fetch_all(model: PandasModel) -> None:
+    """Hand every row to the view, as if the user scrolled to the bottom"""
+    while model.canFetchMore():
+        model._fetch_next_batch()
+
+
+def repaint_sweep(model: PandasModel, viewport_rows: int) -> float:
+    """Scroll through the whole sheet one viewport at a time, returns seconds"""
+    columns = model.columnCount()
+    start = time.perf_counter()
+    for top in range(0, model.rowCount(), viewport_rows):
+        for row in range(top, min(top + viewport_rows, model.rowCount())):
+            for column in range(columns):
+                model.data(model.index(row, column), Qt.DisplayRole)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--viewport", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+    sheet = make_sheet(args.rows)
+
+    for name, model_class in [
+        ("before (iloc + str)", UncachedPandasModel),
+        ("after (display cache)", PandasModel),
+    ]:
+        model = model_class(sheet.copy())
+        # the view only sees the fetched rows, the sweep covers the whole sheet
+        fetch_all(model)
+        best = min(repaint_sweep(model, args.viewport) for _ in range(args.repeat))
+        cells = model.rowCount() * model.columnCount()
+        print(
+            f"{name:<24} {best * 1e3:9.1f} ms per full sweep "
+            f"({best / cells * 1e6:.2f} us per cell)"
+        )
+
+
+if __name__ == "__main__":
+    main()
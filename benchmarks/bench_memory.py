@@ -0,0 +1,181 @@
+"""
+Peak memory of the stages a sample sheet goes through, with a budget per stage.
+
+A synthetic Analytix export is imported, a PandasModel is built from it, a full
+undo stack of edits is pushed and every export format is written. The peak of
+the memory python allocates in each stage is traced with tracemalloc and held
+against the budget of the stage, the high-water mark of the RSS is reported
+with it. The script exits with 1 when a stage is over its budget.
+
+Run from the repository root:
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_memory.py
+    python benchmarks/bench_memory.py --sizes 1000000 --json memory.json
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:
+    # not on Windows, only the traced memory is reported there
+    resource = None
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtGui import QUndoStack
+from PySide6.QtWidgets import QApplication
+
+from mainwindow import UNDO_LIMIT
+from poresamplespandas.core.sample_sheet import make_controls
+from poresamplespandas.export.projection import SheetProjection
+from poresamplespandas.export.writers import WRITERS, write_export
+from poresamplespandas.import_data.import_analytix import import_analytix
+from poresamplespandas.models.pandas_model import PandasModel
+from poresamplespandas.plate.plate_geometry import PlateGeometry
+from poresamplespandas.undo.commands import (
+    EditCellsCommand,
+    InsertRowsCommand,
+    RemoveRowsCommand,
+)
+from synthetic import write_analytix
+
+SIZES = [10_000, 100_000]
+MB = 1 << 20
+# traced peak allowed per stage, in bytes: a fixed part plus a part per sample
+BUDGETS = {
+    "import": (8 * MB, 500),
+    "model": (4 * MB, 800),
+    "undo": (4 * MB, 350),
+    "export": (8 * MB, 700),
+}
+
+
+def budget(stage: str, rows: int) -> int:
+    fixed, per_row = BUDGETS[stage]
+    return fixed + per_row * rows
+
+
+def max_rss() -> int:
+    """High-water mark of the resident set of this process, in bytes"""
+    if resource is None:
+        return 0
+    # kilobytes on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def measure(function) -> tuple:
+    """Run function, returns its result and the memory it took"""
+    gc.collect()
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    result = function()
+    current, peak = tracemalloc.get_traced_memory()
+    return result, {
+        "peak": peak - before,
+        "retained": current - before,
+        "max_rss": max_rss(),
+    }
+
+
+def fill_undo_stack(model: PandasModel) -> QUndoStack:
+    """
+    A full undo stack of the edits a user makes: comments, removed rows, new
+    controls and now and then barcodes for the whole sheet
+    """
+    stack = QUndoStack()
+    stack.setUndoLimit(UNDO_LIMIT)
+    for edit in range(UNDO_LIMIT):
+        rows = model._data.shape[0]
+        if edit % 25 == 0:
+            command = EditCellsCommand(
+                model, list(range(rows)), ["barcodes", "kit"], [f"RB{edit}", "KIT"]
+            )
+        elif edit % 3 == 0:
+            command = RemoveRowsCommand(model, list(range(edit, edit + 5)))
+        elif edit % 3 == 1:
+            command = InsertRowsCommand(model, make_controls("POS", 2))
+        else:
+            command = EditCellsCommand(
+                model, list(range(edit, edit + 10)), ["comment"], f"edit {edit}"
+            )
+        stack.push(command)
+    return stack
+
+
+def write_all(model: PandasModel, geometry: PlateGeometry, workdir: Path) -> list:
+    projection = SheetProjection(model._data.copy(), model.row_classes.copy(), geometry)
+    return [
+        write_export(writer(), projection, workdir / f"sheet{writer.suffix}")
+        for writer in WRITERS.values()
+        if writer.available
+    ]
+
+
+def run_stages(rows: int, workdir: Path) -> dict:
+    """Memory of every stage for a sheet of rows samples"""
+    analytix = write_analytix(workdir / f"analytix_{rows}.txt", rows, pos=4, neg=4)
+    geometry = PlateGeometry()
+    results = {}
+    frame, results["import"] = measure(lambda: import_analytix(analytix))
+    model, results["model"] = measure(
+        lambda: PandasModel(frame, plate_geometry=geometry)
+    )
+    del frame
+    stack, results["undo"] = measure(lambda: fill_undo_stack(model))
+    _, results["export"] = measure(lambda: write_all(model, geometry, workdir))
+    for stage, result in results.items():
+        result["budget"] = budget(stage, rows)
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--json", type=Path, help="write the results here")
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    tracemalloc.start()
+    results = {}
+    over = []
+    print(
+        f"{'stage':<8} {'rows':>8} {'peak':>10} {'retained':>10} "
+        f"{'budget':>10} {'max rss':>10}"
+    )
+    with tempfile.TemporaryDirectory() as workdir:
+        for rows in sorted(args.sizes):
+            results[str(rows)] = run_stages(rows, Path(workdir))
+            for stage, result in results[str(rows)].items():
+                print(
+                    f"{stage:<8} {rows:>8} {result['peak'] / MB:>8.1f}MB "
+                    f"{result['retained'] / MB:>8.1f}MB "
+                    f"{result['budget'] / MB:>8.1f}MB "
+                    f"{result['max_rss'] / MB:>8.1f}MB",
+                    flush=True,
+                )
+                if result["peak"] > result["budget"]:
+                    over.append((stage, rows, result))
+    tracemalloc.stop()
+
+    if args.json is not None:
+        args.json.write_text(json.dumps(results, indent=2))
+    for stage, rows, result in over:
+        print(
+            f"over budget: {stage} at {rows} rows peaked at "
+            f"{result['peak'] / MB:.1f}MB of {result['budget'] / MB:.1f}MB",
+            file=sys.stderr,
+        )
+    return 1 if over else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""
+Cold-start time of the GUI, to track between releases.
+
+Starts the window like main.py does, in a fresh interpreter per run, and
+reports the seconds from launching the interpreter to:
+
+    imports      mainwindow and the model are imported
+    window       MainWindow is constructed
+    first_frame  the window has painted for the first time
+    ready        the tabs are built and the sample file is read
+
+Run from the repository root:
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --runs 20 --json startup.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+MILESTONES = ["imports", "window", "first_frame", "ready"]
+
+# run in the child, prints the wall clock time of every milestone as json
+CHILD = """
+import json, sys, time
+marks = {}
+sys.path.insert(0, %(root)r)
+from PySide6.QtCore import QEvent, QObject, QThreadPool, QTimer
+from PySide6.QtWidgets import QApplication
+from mainwindow import MainWindow
+from poresamplespandas.models.pandas_model import PandasModel
+marks["imports"] = time.time()
+
+app = QApplication(sys.argv)
+mw = MainWindow(model=PandasModel, data=%(data)r, barcodes=%(barcodes)r)
+marks["window"] = time.time()
+
+
+class FirstPaint(QObject):
+    def eventFilter(self, watched, event):
+        if event.type() == QEvent.Paint and "first_frame" not in marks:
+            marks["first_frame"] = time.time()
+        return False
+
+
+first_paint = FirstPaint()
+mw.installEventFilter(first_paint)
+
+
+def check_ready():
+    tabs = mw.tabWidget
+    if (
+        "first_frame" in marks
+        and len(tabs.tabs) == len(tabs.tab_builders)
+        and QThreadPool.globalInstance().activeThreadCount() == 0
+    ):
+        marks["ready"] = time.time()
+        app.quit()
+
+
+timer = QTimer()
+timer.timeout.connect(check_ready)
+timer.start(1)
+mw.show()
+app.exec()
+print(json.dumps(marks))
+"""
+
+
+def run_once(data: str, barcodes: str) -> dict:
+    code = CHILD % {"root": str(ROOT), "data": data, "barcodes": barcodes}
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    start = time.time()
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    marks = json.loads(output.strip().splitlines()[-1])
+    return {name: marks[name] - start for name in MILESTONES}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--data", default="config/new_test.csv")
+    parser.add_argument("--barcodes", default="config/barcodes.yaml")
+    parser.add_argument("--json", type=Path, help="also write the results here")
+    args = parser.parse_args()
+
+    # the first run warms the file cache and the kit cache, it is not counted
+    run_once(args.data, args.barcodes)
+    runs = [run_once(args.data, args.barcodes) for _ in range(args.runs)]
+
+    results = {}
+    print(f"{'milestone':<12} {'median':>8} {'min':>8} {'max':>8}  ({args.runs} runs)")
+    for name in MILESTONES:
+        times = [run[name] for run in runs]
+        results[name] = {
+            "median": statistics.median(times),
+            "min": min(times),
+            "max": max(times),
+        }
+        print(
+            f"{name:<12} {results[name]['median']:>7.3f}s "
+            f"{results[name]['min']:>7.3f}s {results[name]['max']:>7.3f}s"
+        )
+    if args.json is not None:
+        args.json.write_text(json.dumps({"runs": args.runs, **results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
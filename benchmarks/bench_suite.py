@@ -0,0 +1,414 @@
+"""
+Benchmark suite for the hot paths of the model, the importer and the barcodes.
+
+Every benchmark is timed at every sheet size, on the offscreen Qt platform, and
+the results can be saved as JSON and compared against an earlier run:
+
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_suite.py --json base.json
+    python benchmarks/bench_suite.py --compare base.json --json new.json
+
+A comparison exits with 1 when a benchmark got slower than the tolerance allows,
+so it can gate a release. Only the fastest repetition is compared, it is the
+least noisy.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import PySide6
+from PySide6.QtCore import QItemSelection, QItemSelectionModel, Qt
+from PySide6.QtWidgets import QApplication
+
+from mainwindow import CSV_CHUNK_SIZE, CSV_MAX_CHUNK_SIZE, MainWindow
+from poresamplespandas.barcodes.barcode_pool import BarcodePool
+from poresamplespandas.barcodes.kit_catalog import KitCatalog
+from poresamplespandas.core.sample_sheet import make_controls
+from poresamplespandas.import_data.import_analytix import import_analytix
+from poresamplespandas.models.pandas_model import PandasModel
+from poresamplespandas.models.plate_model import PlateModel
+from poresamplespandas.plate.plate_geometry import PlateGeometry
+from synthetic import write_analytix, write_kits
+
+SIZES = [96, 384, 10_000, 100_000]
+BARCODES = ROOT / "config" / "barcodes.yaml"
+KIT = "SQK-RBK110.96"
+# a repaint sweep scrolls through this many screens of this many rows
+VIEWPORTS = 50
+VIEWPORT_ROWS = 40
+# name -> function(size, workdir) returning (setup, run), see benchmark
+BENCHMARKS = {}
+
+
+def benchmark(function):
+    """
+    Add a benchmark to the suite. The function prepares everything for one
+    size and returns setup and run: setup puts the state back before every
+    repetition and is not timed, run is what is timed.
+    """
+    BENCHMARKS[function.__name__.removeprefix("bench_")] = function
+    return function
+
+
+def make_sheet(rows: int) -> pd.DataFrame:
+    """A sample sheet in random order, with a few controls"""
+    rng = np.random.default_rng(0)
+    sample_ids = [f"21COR{i:06d}" for i in rng.permutation(rows)]
+    for i, name in zip(range(0, rows, max(rows // 4, 1)), ["POS", "NEG"] * 2):
+        sample_ids[i] = f"{name}_CTRL{i + 1}"
+    return pd.DataFrame(
+        {
+            "sample_id": sample_ids,
+            "order": 0,
+            "age": rng.integers(1, 100, rows).astype(float),
+            "barcodes": " ",
+            "kit": " ",
+            "comment": " ",
+        }
+    )
+
+
+def fetch_all(model: PandasModel) -> None:
+    """Hand every row to the view, as if the user scrolled to the bottom"""
+    while model.canFetchMore():
+        model._fetch_next_batch()
+
+
+def nothing() -> None:
+    pass
+
+
+def viewports(rows: int) -> list:
+    """Rows of VIEWPORTS screens of VIEWPORT_ROWS rows, spread over the sheet"""
+    tops = np.linspace(0, max(rows - VIEWPORT_ROWS, 0), VIEWPORTS, dtype=int)
+    return [row for top in tops for row in range(top, min(top + VIEWPORT_ROWS, rows))]
+
+
+@benchmark
+def bench_data(size, workdir):
+    """PandasModel.data for the text and colour of every cell in the viewports"""
+    model = PandasModel(make_sheet(size))
+    fetch_all(model)
+    indexes = [
+        model.index(row, column)
+        for row in viewports(size)
+        for column in range(model.columnCount())
+    ]
+
+    def run():
+        for index in indexes:
+            model.data(index, Qt.DisplayRole)
+            model.data(index, Qt.BackgroundRole)
+
+    return nothing, run
+
+
+@benchmark
+def bench_header_data(size, workdir):
+    """PandasModel.headerData for the wells of the viewports and the columns"""
+    model = PandasModel(make_sheet(size))
+    rows = viewports(size)
+
+    def run():
+        for row in rows:
+            model.headerData(row, Qt.Vertical, Qt.DisplayRole)
+        for column in range(model.columnCount()):
+            model.headerData(column, Qt.Horizontal, Qt.DisplayRole)
+
+    return nothing, run
+
+
+@benchmark
+def bench_sort(size, workdir):
+    """PandasModel.sort of a shuffled sheet, with the sort keys built from scratch"""
+    model = PandasModel(make_sheet(size))
+    shuffled = np.random.default_rng(1).permutation(size)
+
+    def setup():
+        model._apply_row_order(shuffled)
+        model._sort_keys = None
+
+    return setup, model.sort
+
+
+@benchmark
+def bench_add_row(size, workdir):
+    """PandasModel.addRow of four positive controls"""
+    model = PandasModel(make_sheet(size))
+    controls = make_controls("POS", 4)
+    added = []
+
+    def setup():
+        if added:
+            model.remove_rows(model.rows_of(added.pop()).tolist())
+
+    def run():
+        added.append(model.addRow(controls))
+
+    return setup, run
+
+
+@benchmark
+def bench_append_rows(size, workdir):
+    """
+    PandasModel.append_rows of every chunk of a background csv read, the work
+    the GUI thread does while a large file loads
+    """
+    sheet = make_sheet(size)
+    model = PandasModel(sheet.iloc[:0])
+    # the reader sorts every chunk on its own thread, which is not timed
+    chunks, start, chunk_size = [], 0, CSV_CHUNK_SIZE
+    while start < size:
+        chunks.append(model.sorted_rows(sheet.iloc[start : start + chunk_size]))
+        start += chunk_size
+        chunk_size = min(chunk_size * 2, CSV_MAX_CHUNK_SIZE)
+
+    def setup():
+        model.set_dataframe(chunks[0][0].reset_index(drop=True))
+
+    def run():
+        for rows, keys in chunks[1:]:
+            model.append_rows(rows, keys)
+
+    return setup, run
+
+
+@benchmark
+def bench_update_color_list(size, workdir):
+    """PandasModel.update_color_list, the class of every row"""
+    model = PandasModel(make_sheet(size))
+    return nothing, model.update_color_list
+
+
+def make_window(size: int) -> MainWindow:
+    window = MainWindow(model=PandasModel, data=make_sheet(size), barcodes=BARCODES)
+    fetch_all(window.source_model)
+    return window
+
+
+@benchmark
+def bench_remove_and_store(size, workdir):
+    """SampleTableView.remove_and_store of ten selected rows in the middle"""
+    window = make_window(size)
+    view = window.sample_table_view
+    model = window.source_model
+    first = max(size // 2 - 5, 0)
+    last = min(first + 9, size - 1)
+
+    def setup():
+        while window.undo_stack.canUndo():
+            window.undo_stack.undo()
+        view.selectionModel().select(
+            QItemSelection(model.index(first, 0), model.index(last, 0)),
+            QItemSelectionModel.ClearAndSelect | QItemSelectionModel.Rows,
+        )
+
+    return setup, view.remove_and_store
+
+
+class BarcodeDrop:
+    """The parts of a QDropEvent that SampleTableView.dropEvent reads"""
+
+    def __init__(self, source, position):
+        self._source = source
+        self._position = position
+
+    def source(self):
+        return self._source
+
+    def pos(self):
+        return self._position
+
+
+@benchmark
+def bench_barcode_drop(size, workdir):
+    """SampleTableView.dropEvent of a kit's barcodes onto the first rows"""
+    window = make_window(size)
+    window.tabWidget.ensure_tab("barcode")
+    window.tabWidget.load_kit(KIT)
+    barcode_list = window.tabWidget.barcode_lists[KIT]
+    barcode_model = barcode_list.model()
+    dropped = min(size, barcode_model.rowCount())
+    view = window.sample_table_view
+    drop = BarcodeDrop(barcode_list, view.visualRect(view.model().index(0, 0)).center())
+
+    def setup():
+        while window.undo_stack.canUndo():
+            window.undo_stack.undo()
+        # taking the barcodes clears the selection of the list
+        barcode_list.selectionModel().select(
+            QItemSelection(barcode_model.index(0), barcode_model.index(dropped - 1)),
+            QItemSelectionModel.ClearAndSelect | QItemSelectionModel.Rows,
+        )
+
+    return setup, lambda: view.dropEvent(drop)
+
+
+@benchmark
+def bench_plate_widget(size, workdir):
+    """
+    PlateModel.set_source_model and the text and colour of every well, what
+    add_data_to_plate_widget did before the plate became a model
+    """
+    source = PandasModel(make_sheet(size))
+    fetch_all(source)
+    plate = PlateModel(source, PlateGeometry())
+
+    def run():
+        plate.set_source_model(source)
+        for row in range(plate.rowCount()):
+            for column in range(plate.columnCount()):
+                index = plate.index(row, column)
+                plate.data(index, Qt.DisplayRole)
+                plate.data(index, Qt.BackgroundRole)
+
+    return nothing, run
+
+
+@benchmark
+def bench_import_analytix(size, workdir):
+    """import_analytix of an Analytix export, without the import cache"""
+    path = write_analytix(workdir / f"analytix_{size}.txt", size)
+    return nothing, lambda: import_analytix(path)
+
+
+def load_kits(path: Path, cache_dir: Path) -> BarcodePool:
+    """What the barcode tab does for a kit file: list the kits, load every one"""
+    catalog = KitCatalog(path, cache_dir=cache_dir)
+    pool = BarcodePool(catalog)
+    for kit in catalog.kits:
+        pool.load_kit(kit)
+    return pool
+
+
+@benchmark
+def bench_load_kits(size, workdir):
+    """KitCatalog and BarcodePool.load_kit of a kit file with one barcode per row"""
+    path = write_kits(workdir / f"kits_{size}.yaml", size)
+    cache_dir = workdir / f"kit_cache_{size}"
+
+    def setup():
+        # a kit file that was never parsed
+        for cached in cache_dir.glob("*.npz"):
+            cached.unlink()
+
+    return setup, lambda: load_kits(path, cache_dir)
+
+
+@benchmark
+def bench_load_kits_cached(size, workdir):
+    """bench_load_kits of a kit file whose parsed kits are in the cache"""
+    path = write_kits(workdir / f"kits_{size}.yaml", size)
+    cache_dir = workdir / f"kit_cache_{size}"
+    load_kits(path, cache_dir)
+    return nothing, lambda: load_kits(path, cache_dir)
+
+
+def run_benchmark(function, size: int, repeat: int, workdir: Path) -> dict:
+    setup, run = function(size, workdir)
+    times = []
+    for _ in range(repeat):
+        setup()
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return {"min": min(times), "median": statistics.median(times), "repeat": repeat}
+
+
+def run_suite(names: list, sizes: list, repeat: int) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for name in names:
+            results[name] = {}
+            for size in sizes:
+                result = run_benchmark(BENCHMARKS[name], size, repeat, Path(workdir))
+                results[name][str(size)] = result
+                print(
+                    f"{name:<20} {size:>7} {result['min'] * 1e3:>10.2f} ms "
+                    f"{result['median'] * 1e3:>10.2f} ms",
+                    flush=True,
+                )
+    return results
+
+
+def compare(baseline: dict, results: dict, tolerance: float, floor: float) -> list:
+    """
+    Return the benchmarks that are more than tolerance slower than in baseline,
+    differences below floor seconds are noise
+    """
+    regressions = []
+    for name, sizes in results.items():
+        for size, result in sizes.items():
+            old = baseline.get(name, {}).get(size)
+            if old is None:
+                continue
+            new_time, old_time = result["min"], old["min"]
+            if new_time > old_time * (1 + tolerance) and new_time - old_time > floor:
+                regressions.append((name, size, old_time, new_time))
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--only", nargs="+", choices=BENCHMARKS, default=list(BENCHMARKS)
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", type=Path, help="write the results here")
+    parser.add_argument("--compare", type=Path, help="results of an earlier run")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="allowed slowdown against --compare (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--floor",
+        type=float,
+        default=0.001,
+        help="slowdowns of fewer seconds are noise (default: %(default)s)",
+    )
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    print(f"{'benchmark':<20} {'size':>7} {'min':>13} {'median':>13}")
+    results = run_suite(args.only, args.sizes, args.repeat)
+    if args.json is not None:
+        meta = {
+            "python": platform.python_version(),
+            "pyside6": PySide6.__version__,
+            "pandas": pd.__version__,
+            "machine": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        args.json.write_text(json.dumps({"meta": meta, "results": results}, indent=2))
+    if args.compare is None:
+        return 0
+
+    baseline = json.loads(args.compare.read_text())["results"]
+    regressions = compare(baseline, results, args.tolerance, args.floor)
+    for name, size, old_time, new_time in regressions:
+        print(
+            f"regression: {name} at {size} rows took {new_time * 1e3:.2f} ms, "
+            f"{old_time * 1e3:.2f} ms in {args.compare}",
+            file=sys.stderr,
+        )
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""
+Synthetic LIMS exports and barcode kit files of any size.
+
+The Analytix exports look like config/analytix.txt: Swedish headers, ";" between
+fields, decimal commas, positive and negative controls between the samples and
+blank rows that the importer has to drop. Kit files look like
+config/barcodes.yaml. Everything is seeded, the same arguments give the same file.
+
+Run from the repository root:
+    python benchmarks/synthetic.py analytix 100000 big.txt --pos 4 --neg 4
+    python benchmarks/synthetic.py kits 960 kits.yaml
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from poresamplespandas.import_data.import_analytix import column_names
+
+CLIENTS = ["USBJVÅ", "USBAR4", "LSEHMO", "SSKKBG", "SSMAKM", "SSHEHM", "SSSHHM"]
+ANALYSES = ["GXCOV", "NPHCOV2", "POOLCOVP"]
+BASES = np.array(list("ACGT"))
+
+
+def analytix_frame(
+    rows: int, pos: int = 2, neg: int = 2, blank: float = 0.01, seed: int = 0
+) -> pd.DataFrame:
+    """
+    An Analytix export of rows samples plus pos and neg controls, as text the
+    way the LIMS writes it. About blank of the rows are blank or incomplete
+    and are dropped on import.
+    """
+    rng = np.random.default_rng(seed)
+    samples = rows + pos + neg
+    sample_dates = pd.Timestamp("2021-09-30") + pd.to_timedelta(
+        rng.integers(0, 30, samples), unit="D"
+    )
+    results = rng.uniform(10, 40, samples).round(2).astype(str)
+    positive = rng.random(samples) < 0.2
+    results[positive] = "POSITIVE"
+    sample_ids = [f"21COR{i:06d}" for i in rng.permutation(rows)]
+    controls = [f"POS_CTRL{i}" for i in range(1, pos + 1)] + [
+        f"NEG_CTRL{i}" for i in range(1, neg + 1)
+    ]
+    # the controls come in between the samples
+    for position, control in zip(rng.choice(samples, len(controls)), controls):
+        sample_ids.insert(position, control)
+
+    frame = pd.DataFrame(
+        {
+            "Beställarkod": rng.choice(CLIENTS, samples),
+            "Kön": rng.choice(["M", "F"], samples),
+            "Prov ID": [f"4571{i:08d}" for i in rng.permutation(samples)],
+            "Provdatum": sample_dates.strftime("%Y-%m-%d"),
+            "Analys": rng.choice(ANALYSES, samples),
+            "Ålder (vid provtagning)": rng.integers(1, 100, samples).astype(str),
+            "ProvNr": sample_ids,
+            "Godkännandedatum": (sample_dates + pd.Timedelta(days=1)).strftime(
+                "%Y-%m-%d"
+            ),
+            "Resultat": np.char.replace(results, ".", ","),
+        },
+        columns=list(column_names),
+    )
+
+    # blank rows are empty, or only have a result like the second line of a real
+    # export, incomplete rows miss one field the sheet needs
+    blanks = int(samples * blank)
+    if blanks:
+        empty = pd.DataFrame("", index=range(blanks), columns=frame.columns)
+        empty.loc[::2, "Resultat"] = "20,25"
+        incomplete = frame.sample(blanks, random_state=seed).reset_index(drop=True)
+        incomplete.loc[:, "Kön"] = ""
+        frame = pd.concat([frame, empty, incomplete], ignore_index=True)
+        frame = frame.iloc[rng.permutation(frame.shape[0])]
+    return frame
+
+
+def write_analytix(path: Path, rows: int, **options) -> Path:
+    """Write an Analytix export, see analytix_frame for the options"""
+    analytix_frame(rows, **options).to_csv(path, sep=";", index=False)
+    return path
+
+
+def write_kits(
+    path: Path, barcodes: int, kit_size: int = 96, length: int = 24, seed: int = 0
+) -> Path:
+    """Write a kit file with barcodes random barcodes in kits of kit_size"""
+    rng = np.random.default_rng(seed)
+    sequences = ["".join(bases) for bases in rng.choice(BASES, (barcodes, length))]
+    width = len(str(kit_size))
+    with open(path, "w") as f:
+        for start in range(0, barcodes, kit_size):
+            f.write(f"SQK-SYN{start // kit_size + 1:03d}.{kit_size}:\n")
+            for number, sequence in enumerate(
+                sequences[start : start + kit_size], start=1
+            ):
+                f.write(f"    RB{number:0{width}d}: {sequence}\n")
+    return path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    kinds = parser.add_subparsers(dest="kind", required=True)
+    analytix = kinds.add_parser("analytix", help="an Analytix export")
+    analytix.add_argument("rows", type=int, help="samples, without the controls")
+    analytix.add_argument("output", type=Path)
+    analytix.add_argument("--pos", type=int, default=2, help="positive controls")
+    analytix.add_argument("--neg", type=int, default=2, help="negative controls")
+    analytix.add_argument(
+        "--blank", type=float, default=0.01, help="share of blank rows"
+    )
+    analytix.add_argument("--seed", type=int, default=0)
+    kits = kinds.add_parser("kits", help="a barcode kit file")
+    kits.add_argument("barcodes", type=int, help="barcodes over all kits")
+    kits.add_argument("output", type=Path)
+    kits.add_argument("--kit-size", type=int, default=96)
+    kits.add_argument("--length", type=int, default=24, help="bases per barcode")
+    kits.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.kind == "analytix":
+        write_analytix(
+            args.output,
+            args.rows,
+            pos=args.pos,
+            neg=args.neg,
+            blank=args.blank,
+            seed=args.seed,
+        )
+    else:
+        write_kits(
+            args.output,
+            args.barcodes,
+            kit_size=args.kit_size,
+            length=args.length,
+            seed=args.seed,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,9 @@
 """Main module."""
 
 import sys
+from functools import partial
+
+import numpy as np
 import pandas as pd
 from pathlib import Path
 
@@ -8,17 +11,15 @@ from PySide6.QtWidgets import (
     QTableView,
     QApplication,
     QHeaderView,
-    QTableWidgetItem,
-    QTableWidget,
     QMenu,
-    QComboBox,
     QLabel,
     QListWidget,
     QAbstractItemView,
     QListWidgetItem,
     QMainWindow,
     QFileDialog,
-    QSpinBox,
+    QProgressBar,
+    QPushButton,
 )
 from PySide6.QtCore import (
     QAbstractTableModel,
@@ -27,62 +28,122 @@ from PySide6.QtCore import (
     QSortFilterProxyModel,
     Slot,
     QPoint,
+    QThreadPool,
+    QTimer,
 )
 from PySide6 import QtCore, QtGui, QtWidgets
-from PySide6.QtGui import QAction, QShortcut, QKeySequence
-
+from PySide6.QtGui import QAction, QShortcut, QKeySequence, QUndoStack
 
-import qtawesome as qta
 
 from poresamplespandas.ui.mw import Ui_MainWindow
 from poresamplespandas.widgets.tab_widget import TabMenu
 from poresamplespandas.widgets.data_widget import DataWidget
+from poresamplespandas.widgets.icons import icon
+from poresamplespandas.widgets.removed_samples import RemovedSamplesBox
+from poresamplespandas.widgets.control_spinbox import ControlSpinBox
 from poresamplespandas.views.sample_table_view import SampleTableView
-from poresamplespandas.import_data.import_analytix import import_analytix
-from poresamplespandas.enums.enums import VERTICAL_HEADER
-from poresamplespandas.import_data.import_barcodes import (
-    make_barcodes_df,
-    make_barcodes_df2,
+from poresamplespandas.views.plate_delegate import PlateDelegate
+from poresamplespandas.models.plate_model import PlateModel
+from poresamplespandas.workers.csv_reader import CsvChunkReader
+from poresamplespandas.workers.import_worker import ImportWorker
+from poresamplespandas.workers.export_worker import ExportWorker
+from poresamplespandas.export.projection import SheetProjection
+from poresamplespandas.export.writers import WRITERS
+from poresamplespandas.import_data.import_analytix import (
+    import_analytix,
+    IMPORTER_VERSION as ANALYTIX_VERSION,
+)
+from poresamplespandas.import_data.import_cache import ImportCache
+from poresamplespandas.barcodes.barcode_pool import BarcodePool
+from poresamplespandas.barcodes.kit_catalog import KitCatalog
+from poresamplespandas.barcodes.barcode_distance import BarcodeDistances
+from poresamplespandas.barcodes.barcode_assignment import plan_assignment
+from poresamplespandas.plate.plate_geometry import PlateGeometry
+from poresamplespandas.tracing.spans import traced, tracer
+from poresamplespandas.tracing.stall_monitor import StallMonitor
+from poresamplespandas.enums.enums import SAMPLE_CLASS_MARKERS
+from poresamplespandas.core.sample_sheet import (
+    assignment_values,
+    control_changes,
+    unassigned_rows,
+)
+from poresamplespandas.undo.commands import (
+    BatchCommand,
+    ControlsCommand,
+    EditCellsCommand,
+    TakeBarcodesCommand,
+    InsertRowsCommand,
+    RemoveRowsCommand,
+    RestoreSamplesCommand,
 )
-
 
 VERSION = "PORESAMPLESPANDAS"
+# rows of the first chunk of the background csv reader, the chunks grow up to
+# CSV_MAX_CHUNK_SIZE rows
+CSV_CHUNK_SIZE = 1000
+CSV_MAX_CHUNK_SIZE = 4000
+# edits that can be undone, older ones are dropped from the undo stack
+UNDO_LIMIT = 100
+# milliseconds between updates of the trace summary in the status bar
+TRACE_SUMMARY_INTERVAL = 1000
 
 
 class MainWindow(QMainWindow, Ui_MainWindow):
-    def __init__(self, model: QtCore.QAbstractTableModel, data: str, barcodes: str):
+    def __init__(
+        self,
+        model: QtCore.QAbstractTableModel,
+        data: str,
+        barcodes: str,
+        plate_geometry: PlateGeometry = None,
+        undo_limit: int = UNDO_LIMIT,
+    ):
         super(MainWindow, self).__init__()
         self.setupUi(self)
 
         self.setWindowTitle(f"poresamples {VERSION}")
-        self.setWindowIcon(qta.icon("mdi6.cube-outline"))
 
         # removed samples
-        self.removed_samples = QComboBox()
+        self.removed_samples = RemovedSamplesBox()
 
         # barcodes
         self.barcode_file = barcodes
-        self.barcode_df = make_barcodes_df2(self.barcode_file)
+        # a kit file or a directory of them, kits are read when first used
+        self.kit_catalog = KitCatalog(self.barcode_file)
+        self.barcode_pool = BarcodePool(self.kit_catalog)
+        self.barcode_distances = None
 
         # controls
-        self.pos_spinbox = QSpinBox()
+        self.pos_spinbox = ControlSpinBox()
         self.pos_spinbox.setObjectName("POS")
-        self.neg_spinbox = QSpinBox()
+        self.neg_spinbox = ControlSpinBox()
         self.neg_spinbox.setObjectName("NEG")
 
         # should barcodes go here or not??
         self.setup_action_buttons()
         self.populate_toolbar()
 
+        # plate format the samples are laid out on, 96 wells by default
+        self.plate_geometry = plate_geometry or PlateGeometry()
+
+        # undoable edits of the sample sheet
+        self.undo_stack = QUndoStack(self)
+        self.undo_stack.setUndoLimit(undo_limit)
+
         # data widget, source model, sample table view and table widget
         self.input_model = model
+        self.csv_reader = None
+        self.import_worker = None
+        self.import_cache = ImportCache()
+        # exports still being written, with the errors of the current export
+        self.export_workers = []
+        self.export_errors = []
         self.create_model(model=model, data=data)
         self.sample_table_view = SampleTableView(mainwindow=self)
         self.sample_table_view.setModel(self.source_model)
-        self.setup_table_widget()
+        self.setup_plate_view()
         self.datawidget = DataWidget(
             sample_table_view=self.sample_table_view,
-            table_widget=self.table_widget,
+            plate_view=self.plate_view,
             mainwindow=self,
         )
 
@@ -90,12 +151,12 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.pos_spinbox.valueChanged.connect(self.add_row_spinbox)
         self.neg_spinbox.valueChanged.connect(self.add_row_spinbox)
         self.removed_samples.activated.connect(self.restore_removed_samples)
-        self.file_tab_signals()
         self.datawidget.refresh_barcodes.clicked.connect(self.refresh_barcodes)
 
         # shortcuts
-        self.undo_barcode = None
-        self.undo()
+        self.setup_undo()
+        self.setup_import_progress()
+        self.setup_tracing()
         self.save_shortcut = QShortcut(QKeySequence("Ctrl+S"), self)
         self.save_shortcut.activated.connect(self.on_export)
         self.open_shortcut = QShortcut(QKeySequence("Ctrl+O"), self)
@@ -106,8 +167,26 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.horizontalLayout.addWidget(self.datawidget)
         self._hide_columns()
 
+        # icons and tabs are not needed for the first frame, see paintEvent
+        self.startup_finished = False
+
+    def paintEvent(self, event) -> None:
+        super(MainWindow, self).paintEvent(event)
+        if not self.startup_finished:
+            self.startup_finished = True
+            QTimer.singleShot(0, self.finish_startup)
+
+    def finish_startup(self) -> None:
+        """Set the icons and build the tabs once the window is up"""
+        self.setWindowIcon(icon("mdi6.cube-outline"))
+        self.sb_buttons["file"].setIcon(icon("fa5.file"))
+        self.sb_buttons["barcode"].setIcon(icon("ri.barcode-fill", color="red"))
+        self.sb_buttons["help"].setIcon(icon("fa5.question-circle", color="blue"))
+        self.tabWidget.build_tabs_later()
+
     def populate_toolbar(self):
         self.tabWidget = TabMenu(self)
+        self.tabWidget.tab_created.connect(self.on_tab_created)
         self.toolBar.addAction(self.sb_buttons["file"])
         self.toolBar.addAction(self.sb_buttons["barcode"])
         self.toolBar.addAction(self.sb_buttons["help"])
@@ -120,17 +199,14 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             "help": QAction("help", self),
         }
 
-        self.sb_buttons["file"].setIcon(qta.icon("fa5.file"))
         self.sb_buttons["file"].setStatusTip("Files")
         self.sb_buttons["file"].setCheckable(True)
         self.sb_buttons["file"].triggered.connect(self.on_sb_button_click)
 
-        self.sb_buttons["barcode"].setIcon(qta.icon("ri.barcode-fill", color="red"))
         self.sb_buttons["barcode"].setStatusTip("Barcodes")
         self.sb_buttons["barcode"].setCheckable(True)
         self.sb_buttons["barcode"].triggered.connect(self.on_sb_button_click)
 
-        self.sb_buttons["help"].setIcon(qta.icon("fa5.question-circle", color="blue"))
         self.sb_buttons["help"].setStatusTip("help")
         self.sb_buttons["help"].setCheckable(True)
         self.sb_buttons["help"].triggered.connect(self.on_sb_button_click)
@@ -146,70 +222,98 @@ class MainWindow(QMainWindow, Ui_MainWindow):
 
     # TODO add different importers
     def create_model(self, model: QtCore.QAbstractTableModel, data: str) -> None:
-        """Creates a model and returns it"""
-        if not isinstance(data, pd.DataFrame):
-            data = pd.read_csv(data)
-        self.source_model = model(data)
-
-    def setup_table_widget(self):
-        self.table_widget = QTableWidget(8, 12)
-        # names of rows in the 96 plate well goes from A to H.
-        v_header = [QTableWidgetItem(x) for x in "ABCDEFGH"]
-        for i, v in enumerate(v_header):
-            self.table_widget.setVerticalHeaderItem(i, v)
-        header = self.table_widget.verticalHeader()
+        """
+        Creates the source model. A csv file is shown as soon as its first chunk
+        is read, the rest is read in the background and merged into the model.
+        """
+        self.stop_csv_reader()
+        if isinstance(data, QtCore.QAbstractTableModel):
+            # already built, e.g. on the import thread
+            self.source_model = data
+        elif isinstance(data, pd.DataFrame):
+            self.source_model = model(data, plate_geometry=self.plate_geometry)
+        else:
+            # the window shows the columns at once, the rows come from the reader
+            header = pd.read_csv(data, nrows=0)
+            chunks = pd.read_csv(data, chunksize=CSV_CHUNK_SIZE)
+            self.source_model = model(header, plate_geometry=self.plate_geometry)
+            # chunks are sorted on the reader thread, only merged on this one
+            self.csv_reader = CsvChunkReader(
+                chunks, self.source_model.sorted_rows, CSV_MAX_CHUNK_SIZE
+            )
+            self.csv_reader.signals.chunk_read.connect(self.on_csv_chunk_read)
+            QThreadPool.globalInstance().start(self.csv_reader)
+        # comments edited in the view can be undone
+        self.source_model.undo_stack = self.undo_stack
+
+    def on_csv_chunk_read(self, chunk: tuple) -> None:
+        """Merge a sorted chunk and its sort keys from the background reader"""
+        if self.csv_reader is None or self.sender() is not self.csv_reader.signals:
+            # chunk from a file that has been replaced since
+            return
+        rows, keys = chunk
+        if self.source_model.live_count():
+            self.source_model.append_rows(rows, keys)
+        else:
+            # the first rows, the columns get the types of the data
+            self.source_model.set_dataframe(rows.reset_index(drop=True))
+
+    def stop_csv_reader(self) -> None:
+        """Cancel the background reader of the previous file, if any"""
+        if self.csv_reader is not None:
+            self.csv_reader.cancel()
+            self.csv_reader = None
+
+    def setup_plate_view(self):
+        """The plate view shows the samples of the source model on the wells"""
+        self.plate_model = PlateModel(self.source_model, self.plate_geometry)
+        self.plate_view = QTableView()
+        self.plate_view.setModel(self.plate_model)
+        self.plate_view.setItemDelegate(PlateDelegate(self.plate_view))
+        header = self.plate_view.verticalHeader()
         header.setVisible(True)
-        self.add_data_to_plate_widget()
 
     def add_row_spinbox(self, text):
-        # helper function
-        def add_controls(name):
-            controls = []
-            sort_order = -1 if name == "POS" else 1
-            # clean the model dataframe from all controls
-            self.source_model._data = self.source_model._data.loc[
-                lambda x: ~x.sample_id.str.contains(name)
-            ]
-            # update the model to show correct dataframe
-            self.source_model.sort()
-            self.add_data_to_plate_widget()
-
-            # Do not do anything if the user has not set the control to anything
-            if int(text) == 0:
-                return None
-
-            for i in range(1, int(text) + 1):
-                new_df = pd.DataFrame().assign(
-                    sample_id=[f"{name}_CTRL{i}"],
-                    order=[sort_order],
-                    comment=[f"{name} Control"],
-                )
-                controls.append(new_df)
-            self.source_model.addRow(pd.concat(controls))
-            self.add_data_to_plate_widget()
-
-        name = self.sender().objectName()
-        add_controls(name)
-
-    def add_data_to_plate_widget(self):
-        self.table_widget.clearContents()
-        number = 0
-        for sample in self.source_model._data["sample_id"]:
-            item = QTableWidgetItem(sample)
-            # item should not be editable
-            item.setFlags(~QtCore.Qt.ItemIsEditable)
-            if "POS" in sample:
-                item.setBackground(QtGui.QColor("#e5fab9"))
-            elif "NEG" in sample:
-                item.setBackground(QtGui.QColor("#fc9b90"))
-            else:
-                item.setBackground(QtGui.QColor("#b3d0ff"))
-
-            # truncated division and modulo for pushing the correct column
-            self.table_widget.setItem(number % 8, number // 8, item)
-            number += 1
-            if number > 12 * 8:
-                break
+        spinbox = self.sender()
+        name = spinbox.objectName()
+        number = int(text)
+
+        # only the difference to the controls in the sheet is applied
+        model = self.source_model
+        remove, controls = control_changes(
+            model.row_classes,
+            model._display_column(model.find_column_index("sample_id")),
+            name,
+            number,
+        )
+        if len(remove):
+            command = RemoveRowsCommand(model, remove)
+        elif controls.shape[0]:
+            command = InsertRowsCommand(model, controls)
+        else:
+            return
+
+        self.undo_stack.push(
+            ControlsCommand(
+                self.source_model,
+                name,
+                spinbox.gesture,
+                command,
+                f"{number} {name} controls",
+            )
+        )
+
+    def update_control_spinboxes(self) -> None:
+        """Show the number of controls in the sheet, e.g. after an undo"""
+        for spinbox in (self.pos_spinbox, self.neg_spinbox):
+            number = np.count_nonzero(
+                self.source_model.row_classes
+                == SAMPLE_CLASS_MARKERS[spinbox.objectName()]
+            )
+            if spinbox.value() != number:
+                spinbox.blockSignals(True)
+                spinbox.setValue(number)
+                spinbox.blockSignals(False)
 
     def _hide_columns(self):
         """
@@ -218,48 +322,163 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         order = self.source_model.find_column_index("order")
         self.sample_table_view.hideColumn(order)
 
-    def add_removed_samples(self) -> None:
-        """Adds the sample id to the View of removed items"""
-        self.removed_samples.clear()
-        for item in self.source_model.removed_samples_df["sample_id"]:
-            self.removed_samples.addItem(item)
-
     def restore_removed_samples(self, sample_index: int) -> None:
         """Restore the chosen sample to the source model dataframe"""
-        restore = self.source_model.removed_samples_df.iloc[
-            sample_index : sample_index + 1
-        ]
-        self.source_model.addRow(restore)
-        self.removed_samples.removeItem(sample_index)
+        self.undo_stack.push(
+            RestoreSamplesCommand(
+                self.source_model,
+                self.removed_samples.row_id(sample_index),
+                self.removed_samples,
+            )
+        )
 
-        # drop the rows from the removed_samples_df
-        self.source_model.removed_samples_df = (
-            self.source_model.removed_samples_df.drop(index=sample_index).reset_index(
-                drop=True
+    def assign_all_barcodes(self) -> None:
+        """
+        Give every sample without a barcode the next free barcode of the chosen
+        kit, as one write into the sheet and one undoable step
+        """
+        self.tabWidget.ensure_tab("barcode")
+        kit = self.tabWidget.assign_kit.currentText()
+        self.tabWidget.load_kit(kit)
+        unassigned = unassigned_rows(self.source_model._data)
+        rows, barcode_ids = plan_assignment(
+            self.source_model.row_classes,
+            unassigned,
+            self.barcode_pool.free_ids(kit),
+            self.tabWidget.control_placement.currentData(),
+        )
+        if not len(rows):
+            self.statusbar.showMessage("No samples or no free barcodes left", 5000)
+            return
+
+        values = assignment_values(self.barcode_pool, kit, barcode_ids)
+        self.undo_stack.push(
+            BatchCommand(
+                self.source_model,
+                [
+                    EditCellsCommand(
+                        self.source_model, rows.tolist(), ["barcodes", "kit"], values
+                    ),
+                    TakeBarcodesCommand(self, barcode_ids.tolist()),
+                ],
+                f"Assign {len(rows)} barcodes",
             )
         )
-        self.add_data_to_plate_widget()
+        missing = np.count_nonzero(unassigned) - len(rows)
+        self.statusbar.showMessage(
+            f"Assigned {len(rows)} barcodes of {kit}"
+            + (f", {missing} rows are left without one" if missing else ""),
+            5000,
+        )
+
+    def check_barcode_distances(self) -> pd.DataFrame:
+        """Show the assigned barcodes that are too alike in the status bar"""
+        self.tabWidget.ensure_tab("barcode")
+        # the distances between all barcodes of the kits are computed once
+        if self.barcode_distances is None:
+            self.barcode_distances = BarcodeDistances(self.barcode_pool)
+        pairs = self.barcode_distances.assigned_pairs(
+            self.source_model._data["kit"],
+            self.source_model._data["barcodes"],
+            self.tabWidget.min_distance.value(),
+        )
+        if pairs.empty:
+            self.statusbar.showMessage("No assigned barcodes are too alike", 5000)
+            return pairs
+
+        # the closest pairs first
+        closest = ", ".join(
+            "{} {} ~ {} {} ({})".format(*pair)
+            for pair in pairs.head(5).itertuples(index=False)
+        )
+        self.statusbar.showMessage(
+            f"{pairs.shape[0]} barcode pairs are too alike: {closest}"
+        )
+        return pairs
+
+    def on_tab_created(self, name: str) -> None:
+        """Connect the widgets of a tab, tabs are built after the window"""
+        if name == "file":
+            self.file_tab_signals()
+        elif name == "barcode":
+            self.barcode_tab_signals()
 
     def file_tab_signals(self) -> None:
         self.tabWidget.button_import.clicked.connect(self.on_import)
         self.tabWidget.button_export.clicked.connect(self.on_export)
+        self.tabWidget.button_clear_cache.clicked.connect(self.import_cache.clear)
+        self.tabWidget.use_import_cache.setEnabled(self.import_cache.enabled)
+
+    def barcode_tab_signals(self) -> None:
+        self.tabWidget.button_assign_all.clicked.connect(self.assign_all_barcodes)
+        self.tabWidget.button_check_distances.clicked.connect(
+            self.check_barcode_distances
+        )
 
     def on_export(self):
+        # the export formats are picked on the file tab
+        self.tabWidget.ensure_tab("file")
         filename, _ = QFileDialog.getSaveFileName(
             self,
             "Save file",
             "/Users/wiro0005/Desktop",
             "csv file (*.csv)",
         )
-        # filter and save the file
-        (
-            self.source_model._data.drop(columns=["order"])
-            .assign(plate_position=lambda x: VERTICAL_HEADER[: x.shape[0]])
-            .to_csv(filename, index=False)
+        if filename:
+            writers = [
+                WRITERS[name]()
+                for name, checkbox in self.tabWidget.export_formats.items()
+                if checkbox.isChecked()
+            ]
+            self.start_export(writers, Path(filename))
+
+    def start_export(self, writers: list, filename: Path) -> None:
+        """
+        Write the files of an export on the thread pool, all from one snapshot
+        of the sheet. Every file is named by adding the suffix of its writer to
+        filename without .csv.
+        """
+        base = filename.with_suffix("") if filename.suffix == ".csv" else filename
+        projection = SheetProjection(
+            self.source_model._data.copy(),
+            self.source_model.row_classes.copy(),
+            self.plate_geometry,
+            self.barcode_pool.sequence_map(),
         )
+        self.export_errors = []
+        for writer in writers:
+            worker = ExportWorker(
+                writer, projection, base.with_name(base.name + writer.suffix)
+            )
+            worker.signals.error.connect(self.on_export_error)
+            worker.signals.finished.connect(self.on_export_finished)
+            self.export_workers.append(worker)
+            QThreadPool.globalInstance().start(worker)
+        self.statusbar.showMessage(f"Exporting {len(writers)} files to {base}")
+
+    def on_export_error(self, message: str) -> None:
+        self.export_errors.append(message)
+
+    def on_export_finished(self) -> None:
+        self.export_workers = [
+            worker
+            for worker in self.export_workers
+            if worker.signals is not self.sender()
+        ]
+        if self.export_workers:
+            return
+        if self.export_errors:
+            self.statusbar.showMessage(
+                "Export failed: " + "; ".join(self.export_errors), 10000
+            )
+        else:
+            self.statusbar.showMessage("Export done", 5000)
 
     def on_import(self):
-        importers = {"analytix": import_analytix, "illumina": None}
+        importers = {
+            "analytix": self.import_cache.cached(import_analytix, ANALYTIX_VERSION),
+            "illumina": None,
+        }
 
         indata, _ = QFileDialog.getOpenFileName(
             self,
@@ -269,62 +488,143 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         )
 
         if indata:
-            filename = indata
-            current_importer = importers[self.tabWidget.file_type.currentText()]
-            indata = current_importer(Path(indata).resolve())
-
-            # setup new data
-            self.setup_new_data(indata, filename)
-
-    def undo(self):
-        self.sample_table_view.last_state()
-        # remove the old
-        if self.undo_barcode:
-            self.undo_barcode.setParent(None)
-            self.undo_barcode.deleteLater()
-            self.undo_barcode = None
-        self.undo_barcode = QShortcut(QKeySequence("Ctrl+Z"), self)
-        self.undo_barcode.activated.connect(self.sample_table_view.undo_barcodes)
-
-    def setup_new_data(self, indata: pd.DataFrame, filename: str):
+            self.tabWidget.ensure_tab("file")
+            current_importer = partial(
+                importers[self.tabWidget.file_type.currentText()],
+                use_cache=self.tabWidget.use_import_cache.isChecked(),
+            )
+            self.start_import(current_importer, Path(indata).resolve())
+
+    def setup_import_progress(self):
+        """Progress bar and cancel button in the status bar, shown while importing"""
+        self.import_progress = QProgressBar()
+        self.import_progress.setRange(0, 1000)
+        self.import_progress.setMaximumWidth(200)
+        self.cancel_import_button = QPushButton("Cancel import")
+        self.cancel_import_button.clicked.connect(self.cancel_import)
+        for widget in (self.import_progress, self.cancel_import_button):
+            self.statusbar.addPermanentWidget(widget)
+            widget.hide()
+
+    def setup_tracing(self) -> None:
         """
-        When reading in new data everything needs to be flushed and set up again
+        With PORESAMPLES_TRACE set, the status bar shows the last repaint, the
+        slowest recent span and every stall of the event loop
         """
-        # create new models and sample views
-        self.create_model(model=self.input_model, data=indata)
-        self.sample_table_view = SampleTableView(mainwindow=self)
-        self.sample_table_view.setModel(self.source_model)
-
-        # delete the old data widget
-        self.horizontalLayout.removeWidget(self.datawidget)
-        # delete later was the key for removing the widget
-        self.datawidget.deleteLater()
-        self.datawidget = None
+        self.stall_monitor = None
+        if tracer is None:
+            return
+        self.trace_summary = QLabel()
+        self.statusbar.addPermanentWidget(self.trace_summary)
+        self.trace_timer = QTimer(self)
+        self.trace_timer.timeout.connect(
+            lambda: self.trace_summary.setText(tracer.summary())
+        )
+        self.trace_timer.start(TRACE_SUMMARY_INTERVAL)
+        self.stall_monitor = StallMonitor(tracer, parent=self)
+        self.stall_monitor.stalled.connect(self.on_stall)
+        self.statusbar.showMessage(f"Tracing to {tracer.path}", 5000)
+
+    def on_stall(self, milliseconds: int, spans: list) -> None:
+        cause = " > ".join(spans) if spans else "no traced span"
+        self.statusbar.showMessage(
+            f"Event loop stalled for {milliseconds} ms in {cause}", 5000
+        )
 
-        # add new datawidgets and update things
-        self.datawidget = DataWidget(
-            sample_table_view=self.sample_table_view,
-            table_widget=self.table_widget,
-            mainwindow=self,
-            name_of_file=filename,
+    def start_import(self, importer, input_file: Path) -> None:
+        """Run the importer on the thread pool, the window stays responsive"""
+        self.cancel_import()
+        self.import_worker = ImportWorker(importer, input_file, build=self.build_model)
+        self.import_worker.signals.progress.connect(self.on_import_progress)
+        self.import_worker.signals.result.connect(self.on_import_result)
+        self.import_worker.signals.error.connect(self.on_import_error)
+        self.import_worker.signals.finished.connect(self.on_import_finished)
+        self.import_progress.setValue(0)
+        self.import_progress.show()
+        self.cancel_import_button.show()
+        self.statusbar.showMessage(f"Importing {input_file.name}")
+        QThreadPool.globalInstance().start(self.import_worker)
+
+    def build_model(self, indata: pd.DataFrame) -> QtCore.QAbstractTableModel:
+        """Sorting a large sheet takes a while, so the import thread does it"""
+        return self.input_model(indata, plate_geometry=self.plate_geometry)
+
+    def cancel_import(self) -> None:
+        """Cancel the running import, the current data is kept"""
+        if self.import_worker is not None:
+            self.import_worker.cancel()
+            self.import_worker = None
+            self.statusbar.showMessage("Import cancelled", 3000)
+        self.import_progress.hide()
+        self.cancel_import_button.hide()
+
+    def _from_import_worker(self) -> bool:
+        """True if the signal comes from the import that is running"""
+        return (
+            self.import_worker is not None
+            and self.sender() is self.import_worker.signals
         )
-        self.horizontalLayout.addWidget(self.datawidget)
-        self.add_data_to_plate_widget()
+
+    def on_import_progress(self, done: int, total: int) -> None:
+        if self._from_import_worker() and total:
+            self.import_progress.setValue(done * 1000 // total)
+
+    def on_import_result(self, indata: QtCore.QAbstractTableModel) -> None:
+        if self._from_import_worker():
+            self.statusbar.clearMessage()
+            self.setup_new_data(indata, str(self.import_worker.input_file))
+
+    def on_import_error(self, message: str) -> None:
+        if self._from_import_worker():
+            self.statusbar.showMessage(f"Import failed: {message}")
+
+    def on_import_finished(self) -> None:
+        if self._from_import_worker():
+            self.import_worker = None
+            self.import_progress.hide()
+            self.cancel_import_button.hide()
+
+    def setup_undo(self):
+        """Ctrl+Z and Ctrl+Shift+Z walk through the undo stack"""
+        self.undo_action = self.undo_stack.createUndoAction(self)
+        self.undo_action.setShortcut(QKeySequence.Undo)
+        self.redo_action = self.undo_stack.createRedoAction(self)
+        self.redo_action.setShortcut(QKeySequence.Redo)
+        self.addActions([self.undo_action, self.redo_action])
+        self.undo_stack.indexChanged.connect(self.update_control_spinboxes)
+
+    def setup_new_data(self, indata, filename: str):
+        """
+        When reading in new data the model is replaced. indata is a dataframe or
+        a model that was already built, it is swapped into the views, which are kept.
+        """
+        self.create_model(model=self.input_model, data=indata)
+        self.sample_table_view.setModel(self.source_model)
+        self.plate_model.set_source_model(self.source_model)
+        self.datawidget.filename.setText(filename)
         self._hide_columns()
         self.removed_samples.clear()
-        # update the last state so that ctrl z works
 
-        # refresh barcodes
+        # refresh barcodes, which also clears the undo stack
         self.refresh_barcodes()
-        self.datawidget.refresh_barcodes.clicked.connect(self.refresh_barcodes)
-        self.undo()
+        self.update_control_spinboxes()
 
+    @traced
     def refresh_barcodes(self):
         """
         Refreshes and reloads barcodes. Starts everything over from scratch.
         """
         # remove all barcodes from model dataframe
-        self.source_model._data = self.source_model._data.assign(barcodes=" ", kit=" ")
-        self.source_model.sort()
-        self.barcode_df = make_barcodes_df2(self.barcode_file)
+        with self.source_model.batch():
+            if self.source_model.live_count():
+                self.source_model.set_cells(
+                    list(range(self.source_model.live_count())),
+                    ["barcodes", "kit"],
+                    " ",
+                )
+        self.kit_catalog.refresh()
+        self.barcode_pool = BarcodePool(self.kit_catalog)
+        self.barcode_distances = None
         self.tabWidget.update_barcodes()
+        # the edits on the stack refer to the barcode list that was replaced
+        self.undo_stack.clear()
@@ -0,0 +1,26 @@
+import numpy as np
+
+from ..enums.enums import ControlPlacement, SampleClass
+
+
+def plan_assignment(
+    row_classes: np.ndarray,
+    unassigned: np.ndarray,
+    free_ids: list,
+    placement: ControlPlacement = ControlPlacement.SHEET,
+) -> tuple:
+    """
+    Match the unassigned rows of a sheet, in sheet order, to free barcode ids in
+    pool order. Controls are placed by placement. Returns the rows and their
+    barcode ids, shorter than the unassigned rows if the barcodes run out.
+    """
+    rows = np.flatnonzero(unassigned)
+    if placement is not ControlPlacement.SHEET:
+        is_control = row_classes[rows] != SampleClass.SAMPLE
+        if placement is ControlPlacement.LAST:
+            # stable, the samples and the controls both stay in sheet order
+            rows = rows[np.argsort(is_control, kind="stable")]
+        else:
+            rows = rows[~is_control]
+    count = min(len(rows), len(free_ids))
+    return rows[:count], np.asarray(free_ids[:count], dtype=np.intp)
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+
+# barcodes that differ in fewer positions can not be demultiplexed reliably
+MIN_HAMMING_DISTANCE = 3
+
+# byte -> base code, 0 is padding, lower case is read as upper case
+_BASE_CODES = np.zeros(256, dtype=np.uint8)
+for _code, _bases in enumerate(["Aa", "Cc", "Gg", "Tt", "Nn"], start=1):
+    for _base in _bases:
+        _BASE_CODES[ord(_base)] = _code
+
+
+def encode_sequences(sequences) -> np.ndarray:
+    """
+    Encode sequences as an (n, length) uint8 array of base codes, shorter
+    sequences are padded with 0 to the longest one
+    """
+    sequences = [str(sequence).strip() for sequence in sequences]
+    length = max((len(sequence) for sequence in sequences), default=0)
+    if not length:
+        return np.zeros((len(sequences), 0), dtype=np.uint8)
+    raw = np.array(sequences, dtype=f"S{length}").view(np.uint8)
+    return _BASE_CODES[raw.reshape(len(sequences), length)]
+
+
+def hamming_matrix(codes: np.ndarray) -> np.ndarray:
+    """
+    Pairwise Hamming distances of encoded sequences. Sequences of different
+    length are compared over the longest one, every base past the end of
+    the shorter sequence counts as a mismatch.
+    """
+    distances = np.zeros((codes.shape[0], codes.shape[0]), dtype=np.uint16)
+    # one position at a time keeps the memory at a single n x n matrix
+    for column in codes.T:
+        distances += column[:, None] != column[None, :]
+    return distances
+
+
+class BarcodeDistances:
+    """
+    Hamming distances between all loaded barcodes of a BarcodePool, computed
+    once and again only when more kits have been loaded
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.matrix = None
+        self.update()
+
+    def update(self) -> None:
+        """Compute the distances if the pool has grown since"""
+        if self.matrix is None or len(self.matrix) != len(self.pool):
+            self.matrix = hamming_matrix(encode_sequences(self.pool.sequences))
+
+    def close_pairs(
+        self, barcode_ids=None, threshold: int = MIN_HAMMING_DISTANCE
+    ) -> pd.DataFrame:
+        """
+        Pairs of barcodes, among barcode_ids or the whole pool, that differ in
+        fewer than threshold positions, closest pairs first
+        """
+        self.update()
+        if barcode_ids is None:
+            barcode_ids = np.arange(len(self.pool))
+        barcode_ids = np.asarray(barcode_ids, dtype=np.intp)
+        distances = self.matrix[np.ix_(barcode_ids, barcode_ids)]
+        first, second = np.triu_indices(len(barcode_ids), k=1)
+        close = distances[first, second] < threshold
+        first, second = barcode_ids[first[close]], barcode_ids[second[close]]
+        pairs = pd.DataFrame(
+            {
+                "kit_1": self.pool.kits_of(first),
+                "barcode_1": self.pool.names[first],
+                "kit_2": self.pool.kits_of(second),
+                "barcode_2": self.pool.names[second],
+                "distance": self.matrix[first, second],
+            }
+        )
+        return pairs.sort_values("distance", kind="stable").reset_index(drop=True)
+
+    def assigned_pairs(
+        self, kits, names, threshold: int = MIN_HAMMING_DISTANCE
+    ) -> pd.DataFrame:
+        """
+        Close pairs among the barcodes assigned in a sheet, given as its kit and
+        barcodes columns. A barcode that is assigned twice has distance 0.
+        """
+        barcode_ids = [
+            self.pool.id_of(kit, name)
+            for kit, name in zip(kits, names)
+            if (kit, name) in self.pool
+        ]
+        return self.close_pairs(barcode_ids, threshold)
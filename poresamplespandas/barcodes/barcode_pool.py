@@ -0,0 +1,173 @@
+from bisect import bisect_left, insort
+
+import numpy as np
+
+from .kit_catalog import KitCatalog
+
+
+class BarcodePool:
+    """
+    The barcodes of every kit and which of them are still free.
+
+    The pool knows the names of all kits in its catalog, but the barcodes of a
+    kit are only read when the kit is loaded. Every loaded barcode has an
+    integer id, its position in the pool, the barcodes of a kit get
+    consecutive ids in file order. A bitmap over the ids answers whether a
+    barcode is free, and every kit keeps a sorted list of its free ids, which
+    is the order the barcodes are listed in and lets a list view find the row
+    of a barcode. A released barcode goes back to its original place in the
+    list.
+
+    The list costs allocating or releasing a single barcode O(log k + k) for
+    a kit of k barcodes, a bisect and a shift of the list, rather than the O(1)
+    of the bit alone. Several barcodes of a kit at once rebuild its list from
+    the bitmap in one O(k) pass, so assigning a whole kit stays linear.
+    """
+
+    def __init__(self, catalog: KitCatalog):
+        self.catalog = catalog
+        self._kits = None
+        self.names = np.empty(0, dtype=object)
+        self.sequences = np.empty(0, dtype=object)
+        self.kit_codes = np.empty(0, dtype=np.intp)
+        self._ids = {}
+        self._kit_ranges = {}
+        self._free = np.empty(0, dtype=bool)
+        self._free_ids = {}
+
+    @property
+    def kits(self) -> list:
+        """Names of all kits, loaded or not, the catalog is read on first use"""
+        if self._kits is None:
+            self._kits = self.catalog.kits
+        return self._kits
+
+    def is_loaded(self, kit: str) -> bool:
+        return kit in self._kit_ranges
+
+    def load_kit(self, kit: str) -> None:
+        """Read the barcodes of a kit into the pool, all free, unless already read"""
+        if self.is_loaded(kit):
+            return
+        frame = self.catalog.kit(kit)
+        start = len(self.names)
+        barcode_ids = range(start, start + len(frame))
+        names = frame["name"].to_numpy(dtype=object)
+        self.names = np.concatenate([self.names, names])
+        self.sequences = np.concatenate(
+            [self.sequences, frame["barcode"].to_numpy(dtype=object)]
+        )
+        self.kit_codes = np.concatenate(
+            [self.kit_codes, np.full(len(frame), self.kits.index(kit), dtype=np.intp)]
+        )
+        self._ids.update(((kit, name), i) for i, name in zip(barcode_ids, names))
+        self._kit_ranges[kit] = barcode_ids
+        self._free = np.concatenate([self._free, np.ones(len(frame), dtype=bool)])
+        self._free_ids[kit] = list(barcode_ids)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, barcode) -> bool:
+        """barcode is a (kit, name) pair"""
+        return barcode in self._ids
+
+    def reset(self) -> None:
+        """Make every loaded barcode free again"""
+        self._free[:] = True
+        self._free_ids = {kit: list(ids) for kit, ids in self._kit_ranges.items()}
+
+    def kit(self, barcode_id: int) -> str:
+        return self.kits[self.kit_codes[barcode_id]]
+
+    def kits_of(self, barcode_ids) -> np.ndarray:
+        """The kit of every barcode id, vectorized"""
+        return np.asarray(self.kits, dtype=object)[self.kit_codes[barcode_ids]]
+
+    def name(self, barcode_id: int) -> str:
+        return self.names[barcode_id]
+
+    def id_of(self, kit: str, name: str) -> int:
+        """The id of a barcode, KeyError if the kit has no such barcode"""
+        return self._ids[kit, name]
+
+    def allocated_ids(self, kits, names) -> list:
+        """
+        Ids of the (kit, name) pairs that are allocated barcodes of the pool,
+        anything else (e.g. empty cells) is skipped
+        """
+        barcode_ids = (self._ids.get(barcode) for barcode in zip(kits, names))
+        return list(
+            dict.fromkeys(
+                barcode_id
+                for barcode_id in barcode_ids
+                if barcode_id is not None and not self._free[barcode_id]
+            )
+        )
+
+    def sequence_map(self) -> dict:
+        """(kit, name) -> sequence of every loaded barcode"""
+        return {barcode: self.sequences[i] for barcode, i in self._ids.items()}
+
+    def kit_ids(self, kit: str) -> range:
+        """Ids of all barcodes of a loaded kit, free or not"""
+        return self._kit_ranges[kit]
+
+    def free_ids(self, kit: str) -> list:
+        """Sorted ids of the free barcodes of a loaded kit, do not modify the list"""
+        return self._free_ids[kit]
+
+    def is_free(self, barcode_id: int) -> bool:
+        return bool(self._free[barcode_id])
+
+    def row_of(self, barcode_id: int) -> int:
+        """
+        Row of the barcode in the list of free barcodes of its kit, or the row it
+        would be inserted at if it is allocated
+        """
+        return bisect_left(self._free_ids[self.kit(barcode_id)], barcode_id)
+
+    def allocate(self, barcode_ids) -> None:
+        """Mark barcodes, of any mix of kits, as used"""
+        barcode_ids = list(barcode_ids)
+        self._check(barcode_ids, free=True)
+        self._free[barcode_ids] = False
+        for kit, ids in self._group_by_kit(barcode_ids).items():
+            free_ids = self._free_ids[kit]
+            if len(ids) == 1:
+                del free_ids[bisect_left(free_ids, ids[0])]
+            else:
+                self._rebuild_free_ids(kit)
+
+    def release(self, barcode_ids) -> None:
+        """Make used barcodes free again, at their original place in the kit"""
+        barcode_ids = list(barcode_ids)
+        self._check(barcode_ids, free=False)
+        self._free[barcode_ids] = True
+        for kit, ids in self._group_by_kit(barcode_ids).items():
+            if len(ids) == 1:
+                insort(self._free_ids[kit], ids[0])
+            else:
+                self._rebuild_free_ids(kit)
+
+    def _group_by_kit(self, barcode_ids: list) -> dict:
+        groups = {}
+        for barcode_id in barcode_ids:
+            groups.setdefault(self.kit(barcode_id), []).append(barcode_id)
+        return groups
+
+    def _rebuild_free_ids(self, kit: str) -> None:
+        """Read the free ids of a kit from the bitmap, in place of its list"""
+        kit_ids = self._kit_ranges[kit]
+        free = np.flatnonzero(self._free[kit_ids.start : kit_ids.stop])
+        self._free_ids[kit][:] = (free + kit_ids.start).tolist()
+
+    def _check(self, barcode_ids: list, free: bool) -> None:
+        """Raise ValueError unless every barcode is free (or used)"""
+        if len(set(barcode_ids)) != len(barcode_ids):
+            raise ValueError("barcodes are given more than once")
+        wrong = [i for i in barcode_ids if self._free[i] != free]
+        if wrong:
+            state = "used" if free else "free"
+            names = ", ".join(f"{self.kit(i)} {self.name(i)}" for i in wrong)
+            raise ValueError(f"barcodes are already {state}: {names}")
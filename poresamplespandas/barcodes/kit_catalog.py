@@ -0,0 +1,155 @@
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from ..import_data.import_cache import CACHE_DIR
+
+# parsed kit files, one npz file per kit file
+KIT_CACHE_DIR = CACHE_DIR / "kits"
+KIT_FILE_PATTERNS = ("*.yaml", "*.yml")
+
+
+class KitCatalog:
+    """
+    The barcode kits in a kit file or a directory of kit files. A kit file maps
+    kit names to barcode names and their sequences, like config/barcodes.yaml.
+
+    The catalog only reads which kits there are, the barcodes of a kit are
+    loaded when the kit is first used. Parsed kit files are cached as npz
+    files, which are used for as long as the size and mtime of the kit file
+    stay the same.
+    """
+
+    def __init__(self, source, cache_dir: Path = KIT_CACHE_DIR):
+        self.source = Path(source)
+        self.cache_dir = Path(cache_dir)
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Forget what was read, kit files are looked at again on next use"""
+        # kit name -> kit file, built on first use
+        self._index = None
+        # kit name -> dataframe of its barcodes
+        self._kits = {}
+
+    @property
+    def files(self) -> list:
+        if self.source.is_dir():
+            return sorted(
+                path
+                for pattern in KIT_FILE_PATTERNS
+                for path in self.source.glob(pattern)
+            )
+        return [self.source]
+
+    @property
+    def kits(self) -> list:
+        """Names of all kits in the catalog, in file order"""
+        if self._index is None:
+            self._index = {}
+            for path in self.files:
+                for kit in self._read_kit_names(path):
+                    self._index.setdefault(kit, path)
+        return list(self._index)
+
+    def __contains__(self, kit: str) -> bool:
+        return kit in self.kits
+
+    def kit(self, kit: str) -> pd.DataFrame:
+        """The barcodes of a kit, with the columns kit, name and barcode"""
+        if kit not in self._kits:
+            if kit not in self:
+                raise KeyError(f"no barcode kit {kit} in {self.source}")
+            self._kits.update(self._read_kits(self._index[kit], [kit]))
+        return self._kits[kit]
+
+    def _cache_path(self, path: Path) -> Path:
+        name = hashlib.blake2b(str(path.resolve()).encode(), digest_size=10)
+        return self.cache_dir / f"{path.stem}-{name.hexdigest()}.npz"
+
+    def _load_cache(self, path: Path):
+        """The npz file of a kit file, or None if there is none or it is stale"""
+        try:
+            cache = np.load(self._cache_path(path), allow_pickle=False)
+        except (OSError, ValueError):
+            return None
+        stat = path.stat()
+        if cache["stat"].tolist() != [stat.st_size, stat.st_mtime_ns]:
+            cache.close()
+            return None
+        return cache
+
+    def _read_kit_names(self, path: Path) -> list:
+        cache = self._load_cache(path)
+        if cache is None:
+            kits = self._parse(path)
+            self._kits.update(kits)
+            return list(kits)
+        with cache:
+            return cache["kits"].tolist()
+
+    def _read_kits(self, path: Path, kits: list) -> dict:
+        cache = self._load_cache(path)
+        if cache is None:
+            return self._parse(path)
+        with cache:
+            positions = {kit: i for i, kit in enumerate(cache["kits"].tolist())}
+            return {
+                kit: pd.DataFrame(
+                    {
+                        "kit": kit,
+                        "name": cache[f"names_{positions[kit]}"].astype(object),
+                        "barcode": cache[f"sequences_{positions[kit]}"].astype(object),
+                    }
+                )
+                for kit in kits
+            }
+
+    def _parse(self, path: Path) -> dict:
+        """Parse a kit file with the C loader when there is one, and cache it"""
+        # imported here, a catalog that is read from its cache never needs yaml
+        import yaml
+
+        stat = path.stat()
+        with open(path) as f:
+            loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+            parsed = yaml.load(f, Loader=loader) or {}
+        kits = {
+            str(kit): pd.DataFrame(
+                {
+                    "kit": str(kit),
+                    "name": [str(name) for name in barcodes],
+                    "barcode": [str(sequence) for sequence in barcodes.values()],
+                }
+            )
+            for kit, barcodes in parsed.items()
+        }
+        arrays = {
+            "stat": np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64),
+            "kits": np.array(list(kits), dtype=str),
+        }
+        for i, frame in enumerate(kits.values()):
+            arrays[f"names_{i}"] = frame["name"].to_numpy(dtype=str)
+            arrays[f"sequences_{i}"] = frame["barcode"].to_numpy(dtype=str)
+        try:
+            self._write_cache(path, arrays)
+        except OSError:
+            # without a cache the file is parsed every time
+            pass
+        return kits
+
+    def _write_cache(self, path: Path, arrays: dict) -> None:
+        """Write the npz file of a kit file atomically"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        handle, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(handle, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(temp_path, self._cache_path(path))
+        except BaseException:
+            os.unlink(temp_path)
+            raise
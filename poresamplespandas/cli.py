@@ -0,0 +1,136 @@
+import argparse
+import sys
+from pathlib import Path
+
+from .barcodes.barcode_pool import BarcodePool
+from .barcodes.kit_catalog import KitCatalog
+from .core.sample_sheet import SampleSheet
+from .enums.enums import ControlPlacement, PLATE_FORMATS
+from .export.writers import WRITERS, write_export
+from .import_data.import_analytix import (
+    import_analytix,
+    IMPORTER_VERSION as ANALYTIX_VERSION,
+)
+from .import_data.import_cache import ImportCache
+from .plate.plate_geometry import PlateGeometry
+
+# PySide6 and qtawesome must not be imported from here, the command line has to
+# start fast and run where there is no display
+
+CONTROL_PLACEMENTS = {
+    placement.name.lower(): placement for placement in ControlPlacement
+}
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="poresamplespandas",
+        description=(
+            "Turn LIMS exports into sample sheets without the GUI: import, "
+            "add controls, assign barcodes and export every file."
+        ),
+    )
+    parser.add_argument("inputs", nargs="+", type=Path, help="Analytix files")
+    parser.add_argument(
+        "-b",
+        "--barcodes",
+        type=Path,
+        default=Path("config/barcodes.yaml"),
+        help="kit file or directory of kit files (default: %(default)s)",
+    )
+    parser.add_argument(
+        "-k", "--kit", help="kit to assign barcodes from (default: the first kit)"
+    )
+    parser.add_argument(
+        "--pos",
+        type=int,
+        help="positive controls in the sheet (default: keep those of the file)",
+    )
+    parser.add_argument(
+        "--neg",
+        type=int,
+        help="negative controls in the sheet (default: keep those of the file)",
+    )
+    parser.add_argument(
+        "--controls",
+        choices=CONTROL_PLACEMENTS,
+        default="sheet",
+        help="barcodes for the controls: in sheet order, last or none",
+    )
+    parser.add_argument(
+        "--plate",
+        type=int,
+        choices=PLATE_FORMATS,
+        default=96,
+        help="wells per plate (default: %(default)s)",
+    )
+    parser.add_argument(
+        "-f",
+        "--formats",
+        nargs="+",
+        choices=[name for name, writer in WRITERS.items() if writer.available],
+        default=["sheet"],
+        help="files to write (default: %(default)s)",
+    )
+    parser.add_argument(
+        "-o",
+        "--output-dir",
+        type=Path,
+        help="where to write the files (default: next to each input)",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="always parse the input files"
+    )
+    return parser.parse_args(argv)
+
+
+def process_file(input_file: Path, args, catalog: KitCatalog, importer) -> list:
+    """Run one input file through the whole sheet, returns the written files"""
+    sheet = SampleSheet(importer(input_file, use_cache=not args.no_cache))
+    # only the kinds asked for are touched, the others stay as in the file
+    for name, number in (("POS", args.pos), ("NEG", args.neg)):
+        if number is not None:
+            sheet.set_controls(name, number)
+
+    pool = BarcodePool(catalog)
+    kit = args.kit or catalog.kits[0]
+    assigned = sheet.assign_barcodes(pool, kit, CONTROL_PLACEMENTS[args.controls])
+    if assigned < sheet.data.shape[0]:
+        print(
+            f"{input_file}: {sheet.data.shape[0] - assigned} rows have no barcode",
+            file=sys.stderr,
+        )
+
+    projection = sheet.projection(PlateGeometry.from_wells(args.plate), pool)
+    output_dir = args.output_dir or input_file.parent
+    targets = {
+        name: output_dir / (input_file.stem + WRITERS[name].suffix)
+        for name in args.formats
+    }
+    if any(path.resolve() == input_file.resolve() for path in targets.values()):
+        raise ValueError("the export would overwrite the input, use --output-dir")
+    return [
+        write_export(WRITERS[name](), projection, path)
+        for name, path in targets.items()
+    ]
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    catalog = KitCatalog(args.barcodes)
+    if args.kit is not None and args.kit not in catalog:
+        print(f"no barcode kit {args.kit} in {args.barcodes}", file=sys.stderr)
+        return 2
+    if args.output_dir is not None:
+        args.output_dir.mkdir(parents=True, exist_ok=True)
+    importer = ImportCache().cached(import_analytix, ANALYTIX_VERSION)
+
+    failed = 0
+    for input_file in args.inputs:
+        try:
+            for path in process_file(input_file, args, catalog, importer):
+                print(path)
+        except Exception as e:
+            print(f"{input_file}: {e}", file=sys.stderr)
+            failed += 1
+    return 1 if failed else 0
@@ -0,0 +1,159 @@
+import re
+from functools import total_ordering
+
+import numpy as np
+import pandas as pd
+from natsort import natsort_keygen
+
+from ..barcodes.barcode_assignment import plan_assignment
+from ..enums.enums import ControlPlacement, SampleClass, SAMPLE_CLASS_MARKERS
+from ..export.projection import SheetProjection
+from ..plate.plate_geometry import PlateGeometry
+
+# columns a sheet is sorted by, True for ascending
+SORT_ORDER = {"order": True, "sample_id": True}
+# order of the controls, positive controls sort before the samples, negative after
+CONTROL_ORDER = {"POS": -1, "NEG": 1}
+
+
+def classify_samples(sample_ids: pd.Series) -> np.ndarray:
+    """Return one SampleClass code per sample id, one vectorized pass per marker"""
+    sample_ids = sample_ids.astype(str)
+    classes = np.full(len(sample_ids), SampleClass.SAMPLE, dtype=np.int8)
+    # the earlier markers are set last, so they win when an id holds several
+    for marker, sample_class in reversed(SAMPLE_CLASS_MARKERS.items()):
+        classes[sample_ids.str.contains(marker, regex=False).to_numpy()] = sample_class
+    return classes
+
+
+@total_ordering
+class _Descending:
+    """Wraps a sort key so that it orders in reverse"""
+
+    __slots__ = ("key",)
+
+    def __init__(self, key):
+        self.key = key
+
+    def __eq__(self, other):
+        return self.key == other.key
+
+    def __lt__(self, other):
+        return other.key < self.key
+
+
+def make_sort_keys(frame: pd.DataFrame, sortby: dict) -> list:
+    """Return the natural-sort key of every row in frame for the columns in sortby"""
+    if not sortby:
+        return [()] * frame.shape[0]
+    keygen = natsort_keygen()
+    columns = []
+    for column, ascending in sortby.items():
+        keys = [keygen(value) for value in frame[column]]
+        if not ascending:
+            keys = [_Descending(key) for key in keys]
+        columns.append(keys)
+    return list(zip(*columns))
+
+
+def conform_rows(rows: pd.DataFrame, columns) -> pd.DataFrame:
+    """New rows with the columns of the sheet, missing values are blank"""
+    return rows.reindex(columns=columns).fillna(" ")
+
+
+def make_controls(name: str, number: int, first: int = 1) -> pd.DataFrame:
+    """Rows for number controls of a kind, POS or NEG, numbered from first"""
+    return pd.DataFrame(
+        {
+            "sample_id": [f"{name}_CTRL{i}" for i in range(first, first + number)],
+            "order": CONTROL_ORDER[name],
+            "comment": f"{name} Control",
+        }
+    )
+
+
+def control_number(sample_id: str) -> int:
+    """The number at the end of the sample id of a control, 0 if it has none"""
+    match = re.search(r"(\d+)$", str(sample_id))
+    return int(match.group(1)) if match else 0
+
+
+def control_changes(row_classes: np.ndarray, sample_ids, name: str, number: int):
+    """
+    What sets the number of controls of a kind, POS or NEG, to number: the rows
+    of the highest-numbered controls to remove, and the new controls to add,
+    numbered after the highest one. At most one of the two is not empty.
+    """
+    rows = np.flatnonzero(row_classes == SAMPLE_CLASS_MARKERS[name])
+    numbers = np.array([control_number(sample_ids[row]) for row in rows], dtype=int)
+    rows = rows[np.argsort(numbers, kind="stable")]
+    difference = number - len(rows)
+    if difference < 0:
+        return rows[difference:], make_controls(name, 0)
+    first = int(numbers.max()) + 1 if len(rows) else 1
+    return rows[:0], make_controls(name, difference, first)
+
+
+def unassigned_rows(data: pd.DataFrame) -> np.ndarray:
+    """Boolean mask of the rows without a barcode"""
+    return (data["barcodes"].astype(str).str.strip() == "").to_numpy()
+
+
+def assignment_values(pool, kit: str, barcode_ids) -> np.ndarray:
+    """The barcodes and kit columns of rows that get the barcode_ids of a kit"""
+    return np.column_stack(
+        [pool.names[barcode_ids], np.full(len(barcode_ids), kit, dtype=object)]
+    )
+
+
+class SampleSheet:
+    """
+    A sample sheet without a view, for the command line. The rows are kept
+    sorted like PandasModel keeps them, with the same helpers, but every edit
+    goes straight to the dataframe.
+    """
+
+    def __init__(self, data: pd.DataFrame, sortby: dict = None):
+        self.sortby = dict(SORT_ORDER if sortby is None else sortby)
+        self.data = data
+        self.sort()
+
+    @property
+    def row_classes(self) -> np.ndarray:
+        return classify_samples(self.data["sample_id"])
+
+    def sort(self) -> None:
+        keys = make_sort_keys(self.data, self.sortby)
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        self.data = self.data.iloc[order].reset_index(drop=True)
+
+    def set_controls(self, name: str, number: int) -> None:
+        """Set the number of controls of a kind, POS or NEG, see control_changes"""
+        remove, controls = control_changes(
+            self.row_classes, self.data["sample_id"].to_numpy(), name, number
+        )
+        data = self.data.drop(index=remove)
+        controls = conform_rows(controls, data.columns)
+        self.data = pd.concat([data, controls], ignore_index=True)
+        self.sort()
+
+    def assign_barcodes(
+        self, pool, kit: str, placement: ControlPlacement = ControlPlacement.SHEET
+    ) -> int:
+        """
+        Give every row without a barcode the next free barcode of kit, returns
+        the number of rows that got one
+        """
+        pool.load_kit(kit)
+        rows, barcode_ids = plan_assignment(
+            self.row_classes, unassigned_rows(self.data), pool.free_ids(kit), placement
+        )
+        columns = [self.data.columns.get_loc(c) for c in ("barcodes", "kit")]
+        self.data.iloc[rows, columns] = assignment_values(pool, kit, barcode_ids)
+        pool.allocate(barcode_ids)
+        return len(rows)
+
+    def projection(self, plate_geometry: PlateGeometry, pool=None) -> SheetProjection:
+        """The sheet as it is exported"""
+        sequences = pool.sequence_map() if pool is not None else None
+        return SheetProjection(self.data, self.row_classes, plate_geometry, sequences)
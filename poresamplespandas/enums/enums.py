@@ -1,98 +1,42 @@
-VERTICAL_HEADER = [
-    "A1",
-    "B1",
-    "C1",
-    "D1",
-    "E1",
-    "F1",
-    "G1",
-    "H1",
-    "A2",
-    "B2",
-    "C2",
-    "D2",
-    "E2",
-    "F2",
-    "G2",
-    "H2",
-    "A3",
-    "B3",
-    "C3",
-    "D3",
-    "E3",
-    "F3",
-    "G3",
-    "H3",
-    "A4",
-    "B4",
-    "C4",
-    "D4",
-    "E4",
-    "F4",
-    "G4",
-    "H4",
-    "A5",
-    "B5",
-    "C5",
-    "D5",
-    "E5",
-    "F5",
-    "G5",
-    "H5",
-    "A6",
-    "B6",
-    "C6",
-    "D6",
-    "E6",
-    "F6",
-    "G6",
-    "H6",
-    "A7",
-    "B7",
-    "C7",
-    "D7",
-    "E7",
-    "F7",
-    "G7",
-    "H7",
-    "A8",
-    "B8",
-    "C8",
-    "D8",
-    "E8",
-    "F8",
-    "G8",
-    "H8",
-    "A9",
-    "B9",
-    "C9",
-    "D9",
-    "E9",
-    "F9",
-    "G9",
-    "H9",
-    "A10",
-    "B10",
-    "C10",
-    "D10",
-    "E10",
-    "F10",
-    "G10",
-    "H10",
-    "A11",
-    "B11",
-    "C11",
-    "D11",
-    "E11",
-    "F11",
-    "G11",
-    "H11",
-    "A12",
-    "B12",
-    "C12",
-    "D12",
-    "E12",
-    "F12",
-    "G12",
-    "H12",
-]
+from enum import Enum, IntEnum
+
+# rows and columns of the supported plate formats, keyed by number of wells
+PLATE_FORMATS = {
+    96: (8, 12),
+    384: (16, 24),
+    1536: (32, 48),
+}
+
+
+class SampleClass(IntEnum):
+    """Row classes used for colouring samples and controls"""
+
+    SAMPLE = 0
+    POS = 1
+    NEG = 2
+
+
+# substring in sample_id that marks a row as a certain class. When a sample_id
+# holds several, the marker listed first decides, rows without a marker are
+# SampleClass.SAMPLE
+SAMPLE_CLASS_MARKERS = {
+    "POS": SampleClass.POS,
+    "NEG": SampleClass.NEG,
+}
+
+SAMPLE_CLASS_COLORS = {
+    SampleClass.SAMPLE: "#b3d0ff",
+    SampleClass.POS: "#e5fab9",
+    SampleClass.NEG: "#fc9b90",
+}
+
+
+class ControlPlacement(Enum):
+    """Where controls go when barcodes are assigned to all samples at once"""
+
+    # in sheet order, positive controls first and negative controls last
+    SHEET = "sheet order"
+    # after all samples, so the samples get consecutive barcodes
+    LAST = "after the samples"
+    # controls get no barcode
+    NONE = "no barcode"
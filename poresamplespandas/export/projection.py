@@ -0,0 +1,73 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from ..enums.enums import SampleClass
+from ..plate.plate_geometry import PlateGeometry
+
+# sample types as MinKNOW and the nextflow pipelines name them
+SAMPLE_TYPES = {
+    SampleClass.SAMPLE: "test_sample",
+    SampleClass.POS: "positive_control",
+    SampleClass.NEG: "negative_control",
+}
+
+
+def barcode_aliases(names) -> pd.Series:
+    """
+    Barcode names the way MinKNOW writes them, RB01 -> barcode01. Names
+    without a number are kept as they are.
+    """
+    names = pd.Series(names, dtype=object).astype(str).str.strip()
+    numbers = names.str.extract(r"(\d+)$", expand=False)
+    aliases = "barcode" + numbers.str.zfill(2)
+    return aliases.where(numbers.notna(), names)
+
+
+class SheetProjection:
+    """
+    The rows of a sheet as they are exported, shared by all writers of one
+    export. It is made from a snapshot of the sheet, so it can be built on a
+    worker thread while the sheet is edited, and it is built only once, by
+    whichever writer needs it first.
+    """
+
+    def __init__(
+        self,
+        data: pd.DataFrame,
+        row_classes: np.ndarray,
+        plate_geometry: PlateGeometry,
+        sequences: dict = None,
+    ):
+        self._source = (data, row_classes, plate_geometry, sequences or {})
+        self._frame = None
+        self._lock = threading.Lock()
+        # the columns of the sample sheet itself, the others are for the writers
+        self.sheet_columns = [column for column in data.columns if column != "order"]
+        self.sheet_columns.append("plate_position")
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        with self._lock:
+            if self._frame is None:
+                self._frame = self._build(*self._source)
+                self._source = None
+        return self._frame
+
+    @staticmethod
+    def _build(data, row_classes, plate_geometry, sequences) -> pd.DataFrame:
+        frame = data.drop(columns=["order"], errors="ignore").reset_index(drop=True)
+        frame["plate_position"] = plate_geometry.labels(frame.shape[0])
+        frame["type"] = pd.Series(row_classes).map(SAMPLE_TYPES).to_numpy()
+        frame["barcode_alias"] = barcode_aliases(frame["barcodes"]).to_numpy()
+        frame["sequence"] = [
+            sequences.get((kit, name), "")
+            for kit, name in zip(frame["kit"], frame["barcodes"])
+        ]
+        return frame
+
+    def barcoded(self) -> pd.DataFrame:
+        """The rows that have a barcode"""
+        frame = self.frame
+        return frame[frame["barcodes"].astype(str).str.strip() != ""]
@@ -0,0 +1,200 @@
+import os
+import secrets
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import pyarrow
+    import pyarrow.parquet as pyarrow_parquet
+except ImportError:
+    pyarrow = None
+
+from ..tracing.spans import traced
+from .projection import SheetProjection
+
+# rows handed to a file at a time
+EXPORT_CHUNK_SIZE = 10_000
+# writers by name, in the order they are offered
+WRITERS = {}
+
+# flags of a new temporary file, O_BINARY keeps windows from translating
+_TEMP_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)
+
+
+def register_writer(writer):
+    """Class decorator that adds a writer to the formats an export can write"""
+    WRITERS[writer.name] = writer
+    return writer
+
+
+class SheetWriter:
+    """
+    Base of the export writers. A writer picks its rows and columns from the
+    projection and writes them to an open file chunk by chunk, as csv unless
+    write is overridden. The file is named by adding suffix to the export name.
+    """
+
+    name = None
+    description = None
+    suffix = None
+    separator = ","
+    binary = False
+    # False e.g. when an optional dependency is missing
+    available = True
+
+    def rows(self, projection: SheetProjection) -> pd.DataFrame:
+        raise NotImplementedError
+
+    def write(self, projection: SheetProjection, handle) -> None:
+        frame = self.rows(projection)
+        # at least one chunk, an empty sheet still gets its header
+        for start in range(0, max(frame.shape[0], 1), EXPORT_CHUNK_SIZE):
+            frame.iloc[start : start + EXPORT_CHUNK_SIZE].to_csv(
+                handle, sep=self.separator, index=False, header=start == 0
+            )
+
+
+@register_writer
+class SampleSheetWriter(SheetWriter):
+    """The sheet as it is shown, with the plate position of every sample"""
+
+    name = "sheet"
+    description = "Sample sheet"
+    suffix = ".csv"
+
+    def rows(self, projection):
+        return projection.frame[projection.sheet_columns]
+
+
+@register_writer
+class MinknowSheetWriter(SheetWriter):
+    """Sample sheet for MinKNOW, one row per barcoded sample"""
+
+    name = "minknow"
+    description = "MinKNOW sample sheet"
+    suffix = ".minknow.csv"
+
+    def __init__(self, flow_cell_id: str = "", experiment_id: str = ""):
+        self.flow_cell_id = flow_cell_id
+        self.experiment_id = experiment_id
+
+    def rows(self, projection):
+        barcoded = projection.barcoded()
+        return pd.DataFrame(
+            {
+                "flow_cell_id": self.flow_cell_id,
+                "experiment_id": self.experiment_id,
+                "kit": barcoded["kit"].to_numpy(),
+                "barcode": barcoded["barcode_alias"].to_numpy(),
+                "alias": barcoded["sample_id"].to_numpy(),
+                "type": barcoded["type"].to_numpy(),
+            }
+        )
+
+
+@register_writer
+class BarcodeArrangementWriter(SheetWriter):
+    """Barcode and sequence of every barcoded sample, for demultiplexing"""
+
+    name = "arrangement"
+    description = "Barcode arrangement"
+    suffix = ".barcodes.tsv"
+    separator = "\t"
+
+    def rows(self, projection):
+        barcoded = projection.barcoded()
+        return pd.DataFrame(
+            {
+                "barcode": barcoded["barcode_alias"].to_numpy(),
+                "kit": barcoded["kit"].to_numpy(),
+                "sequence": barcoded["sequence"].to_numpy(),
+                "alias": barcoded["sample_id"].to_numpy(),
+            }
+        )
+
+
+@register_writer
+class PipelineSheetWriter(SheetWriter):
+    """Sample sheet for the nextflow pipelines, barcode, alias and type"""
+
+    name = "pipeline"
+    description = "Pipeline samplesheet"
+    suffix = ".samplesheet.csv"
+
+    def rows(self, projection):
+        barcoded = projection.barcoded()
+        return pd.DataFrame(
+            {
+                "barcode": barcoded["barcode_alias"].to_numpy(),
+                "alias": barcoded["sample_id"].to_numpy(),
+                "type": barcoded["type"].to_numpy(),
+            }
+        )
+
+
+@register_writer
+class ParquetArchiveWriter(SheetWriter):
+    """Everything in the projection as parquet, one row group per chunk"""
+
+    name = "archive"
+    description = "Parquet archive"
+    suffix = ".parquet"
+    binary = True
+    available = pyarrow is not None
+
+    def rows(self, projection):
+        frame = projection.frame
+        # mixed columns, like age with blanks, are archived as text
+        return frame.astype(
+            {column: str for column in frame.columns if frame[column].dtype == object}
+        )
+
+    def write(self, projection, handle):
+        frame = self.rows(projection)
+        schema = pyarrow.Schema.from_pandas(frame, preserve_index=False)
+        with pyarrow_parquet.ParquetWriter(handle, schema) as writer:
+            for start in range(0, frame.shape[0], EXPORT_CHUNK_SIZE):
+                writer.write_table(
+                    pyarrow.Table.from_pandas(
+                        frame.iloc[start : start + EXPORT_CHUNK_SIZE],
+                        schema=schema,
+                        preserve_index=False,
+                    )
+                )
+
+
+def _create_temp(path: Path) -> tuple:
+    """
+    Create a temporary file next to path. Unlike mkstemp it is created with
+    the permissions of any new file of the user, the umask applies to it
+    """
+    while True:
+        temp_path = path.with_name(f".{path.name}.{secrets.token_hex(4)}.tmp")
+        try:
+            return os.open(temp_path, _TEMP_FLAGS, 0o666), temp_path
+        except FileExistsError:
+            continue
+
+
+@traced
+def write_export(writer: SheetWriter, projection: SheetProjection, path) -> Path:
+    """
+    Write a file atomically: it is written to a temporary file next to path
+    and renamed when it is complete, so a failed export leaves nothing behind
+    and never half overwrites an older file
+    """
+    path = Path(path)
+    handle, temp_path = _create_temp(path)
+    try:
+        if writer.binary:
+            f = os.fdopen(handle, "wb")
+        else:
+            f = os.fdopen(handle, "w", encoding="utf-8", newline="")
+        with f:
+            writer.write(projection, f)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+    return path
@@ -1,5 +1,15 @@
+import os
+
 import pandas as pd
 
+try:
+    import pyarrow
+    from pyarrow import csv as pyarrow_csv
+except ImportError:
+    pyarrow = None
+
+from ..tracing.spans import traced
+
 column_names = {
     "Beställarkod": "client",
     "Kön": "sex",
@@ -12,17 +22,101 @@ column_names = {
     "Resultat": "result",
 }
 
+# columns that are not read as text, numbers use the Swedish decimal comma
+column_dtypes = {"Ålder (vid provtagning)": "float64"}
+
+# columns of the Analytix file that end up in the sample sheet
+kept_columns = ["sample_id", "sex", "age"]
+
+# bump when the cleaned frame changes, cached imports of older versions are not used
+IMPORTER_VERSION = 1
+
+# rows parsed at a time by pandas, bytes at a time by pyarrow
+CHUNK_SIZE = 50_000
+PYARROW_BLOCK_SIZE = 1 << 22
+
+
+def read_analytix_chunks(input_file, chunk_size: int = CHUNK_SIZE):
+    """
+    Yields the mapped columns of an Analytix file (a path or a binary file
+    object) as dataframes of at most chunk_size rows, so the whole file is
+    never in memory at once.
+    pyarrow is used when it is installed, otherwise the pandas C parser.
+    """
+    if pyarrow is not None:
+        yield from _read_chunks_pyarrow(input_file)
+        return
+
+    with pd.read_csv(
+        input_file,
+        sep=";",
+        decimal=",",
+        usecols=list(column_names),
+        dtype={column: column_dtypes.get(column, str) for column in column_names},
+        chunksize=chunk_size,
+        engine="c",
+    ) as reader:
+        yield from reader
+
+
+def _read_chunks_pyarrow(input_file):
+    """Read with the multithreaded pyarrow parser, one record batch per chunk"""
+    if isinstance(input_file, os.PathLike):
+        input_file = os.fspath(input_file)
+    reader = pyarrow_csv.open_csv(
+        input_file,
+        read_options=pyarrow_csv.ReadOptions(block_size=PYARROW_BLOCK_SIZE),
+        parse_options=pyarrow_csv.ParseOptions(delimiter=";"),
+        convert_options=pyarrow_csv.ConvertOptions(
+            include_columns=list(column_names),
+            column_types={
+                column: pyarrow.type_for_alias(column_dtypes.get(column, "string"))
+                for column in column_names
+            },
+            decimal_point=",",
+            # empty fields are missing values, as in pandas
+            strings_can_be_null=True,
+        ),
+    )
+    for batch in reader:
+        yield batch.to_pandas()
+
+
+def _open_binary(input_file):
+    """
+    Open the file for the parser. pyarrow gets its own file type: when it fails
+    on a python file object, its read-ahead thread is left waiting for the GIL
+    and the interpreter aborts at exit.
+    """
+    if pyarrow is not None:
+        return pyarrow.OSFile(os.fspath(input_file))
+    return open(input_file, "rb")
+
+
+def clean_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    """Drops incomplete rows and keeps only the columns for the sample sheet"""
+    return chunk.rename(columns=column_names).dropna()[kept_columns]
+
 
-def import_analytix(input_file: str) -> pd.DataFrame:
+@traced
+def import_analytix(input_file: str, progress=None) -> pd.DataFrame:
     """
     Returns a clean dataframe from Analytix input file
     :param input_file: str. Path to Analytix file.
+    :param progress: callable(bytes_read, file_size), called after every chunk.
     :returns: pd.DataFrame. Cleaned dataframe.
     """
+    chunks = []
+    with _open_binary(input_file) as handle:
+        file_size = os.path.getsize(input_file)
+        for chunk in read_analytix_chunks(handle):
+            chunks.append(clean_chunk(chunk))
+            if progress is not None:
+                progress(handle.tell(), file_size)
+    if not chunks:
+        chunks = [pd.DataFrame(columns=kept_columns)]
     return (
-        pd.read_csv(input_file, sep=";")
-        .rename(columns=column_names)
-        .dropna()
+        pd.concat(chunks, ignore_index=True)
         # add new columns
         .assign(order=0, barcodes=" ", kit=" ", flowcell=" ", comment=" ", testar=" ")
         # order and filter the columns
@@ -0,0 +1,135 @@
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    # the parquet engine
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+# parsed files are cached here, can be moved with PORESAMPLES_CACHE_DIR
+CACHE_DIR = Path(
+    os.environ.get(
+        "PORESAMPLES_CACHE_DIR",
+        Path.home() / ".cache" / "poresamplespandas",
+    )
+)
+IMPORT_CACHE_DIR = CACHE_DIR / "imports"
+# the least recently used imports are evicted above this size
+IMPORT_CACHE_SIZE = 512 * 2**20
+# bytes hashed at a time
+HASH_BLOCK_SIZE = 2**20
+
+
+class ImportCache:
+    """
+    On-disk cache of cleaned import dataframes, stored as parquet.
+
+    An entry is keyed by the content hash, size and mtime of the input file
+    plus the name and version of the importer, so an edited file or a changed
+    importer never hits a stale entry. Loading an entry bumps its mtime,
+    which is what the LRU eviction orders by.
+    """
+
+    def __init__(
+        self,
+        directory: Path = IMPORT_CACHE_DIR,
+        max_bytes: int = IMPORT_CACHE_SIZE,
+        enabled: bool = True,
+    ):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        # without a parquet engine every import is parsed
+        self.enabled = enabled and pyarrow is not None
+
+    def cached(self, importer, version: int):
+        """
+        Wrap an importer, the wrapper takes the same arguments plus
+        use_cache=False to bypass the cache
+        """
+
+        def cached_importer(input_file, progress=None, use_cache: bool = True):
+            if not (use_cache and self.enabled):
+                return importer(input_file, progress=progress)
+
+            key = self.key(input_file, importer, version)
+            frame = self.load(key)
+            if frame is None:
+                frame = importer(input_file, progress=progress)
+                self.store(key, frame)
+            elif progress is not None:
+                size = os.stat(input_file).st_size
+                progress(size, size)
+            return frame
+
+        return cached_importer
+
+    def key(self, input_file, importer, version: int) -> str:
+        """The cache key of input_file read by this version of the importer"""
+        digest = hashlib.blake2b(digest_size=20)
+        with open(input_file, "rb") as f:
+            stat = os.fstat(f.fileno())
+            for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+        digest.update(
+            f"{stat.st_size}:{stat.st_mtime_ns}:"
+            f"{importer.__module__}.{importer.__qualname__}:{version}".encode()
+        )
+        return digest.hexdigest()
+
+    def path(self, key: str) -> Path:
+        return self.directory / f"{key}.parquet"
+
+    def load(self, key: str):
+        """Return the cached dataframe, or None if there is no entry"""
+        path = self.path(key)
+        try:
+            frame = pd.read_parquet(path)
+        except FileNotFoundError:
+            return None
+        # mark as recently used
+        os.utime(path)
+        return frame
+
+    def store(self, key: str, frame: pd.DataFrame) -> None:
+        """Write an entry atomically, then evict down to max_bytes"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        handle, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        os.close(handle)
+        try:
+            frame.to_parquet(temp_path)
+            os.replace(temp_path, self.path(key))
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        self.evict()
+
+    def entries(self) -> list:
+        """The cached entries as (mtime, size, path), least recently used first"""
+        entries = []
+        for path in self.directory.glob("*.parquet"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return sorted(entries)
+
+    def evict(self) -> None:
+        """Remove the least recently used entries until the cache fits max_bytes"""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def clear(self) -> None:
+        """Remove every entry"""
+        for _, _, path in self.entries():
+            path.unlink(missing_ok=True)
@@ -0,0 +1,101 @@
+from PySide6.QtCore import QAbstractListModel, QModelIndex, Qt, QTimer
+
+from ..barcodes.barcode_pool import BarcodePool
+
+
+class BarcodeListModel(QAbstractListModel):
+    """
+    The free barcodes of one kit, read straight from the barcode pool. Barcodes
+    are allocated and released through the model, so that every barcode taken
+    or given back is a single row removal or insertion.
+
+    The list is empty until the kit is loaded, which the view does through
+    fetchMore when the list is first shown.
+    """
+
+    def __init__(self, pool: BarcodePool, kit: str, parent=None):
+        QAbstractListModel.__init__(self, parent)
+        self.pool = pool
+        self.kit = kit
+        self._fetch_pending = False
+
+    def set_pool(self, pool: BarcodePool) -> None:
+        """Show the kit in another pool, e.g. after the barcodes are reloaded"""
+        self.beginResetModel()
+        self.pool = pool
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        """Override method from QAbstractListModel"""
+        if parent == QModelIndex() and self.pool.is_loaded(self.kit):
+            return len(self.pool.free_ids(self.kit))
+        return 0
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        """Override method from QAbstractListModel"""
+        return (
+            parent == QModelIndex()
+            and not self.pool.is_loaded(self.kit)
+            and self.kit in self.pool.kits
+        )
+
+    def fetchMore(self, parent=QModelIndex()) -> None:
+        """
+        Override method from QAbstractListModel
+
+        The kit is loaded on the next pass of the event loop, so a view asking
+        for more while it handles another change never nests the insert.
+        """
+        if not self.canFetchMore(parent) or self._fetch_pending:
+            return
+        self._fetch_pending = True
+        QTimer.singleShot(0, self.load)
+
+    def load(self) -> None:
+        """Load the kit now, its barcodes are inserted as one block"""
+        self._fetch_pending = False
+        if not self.canFetchMore():
+            return
+        count = len(self.pool.catalog.kit(self.kit))
+        if not count:
+            self.pool.load_kit(self.kit)
+            return
+        self.beginInsertRows(QModelIndex(), 0, count - 1)
+        self.pool.load_kit(self.kit)
+        self.endInsertRows()
+
+    def data(self, index: QModelIndex, role=Qt.ItemDataRole):
+        """The name of the barcode, its id for the UserRole"""
+        if not index.isValid():
+            return None
+
+        barcode_id = self.pool.free_ids(self.kit)[index.row()]
+        if role == Qt.DisplayRole:
+            return self.pool.name(barcode_id)
+
+        if role == Qt.UserRole:
+            return barcode_id
+
+        if role == Qt.ToolTipRole:
+            return self.pool.sequences[barcode_id]
+
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsDragEnabled
+
+    def allocate(self, barcode_id: int) -> None:
+        """Allocate a free barcode of the kit in the pool and remove its row"""
+        row = self.pool.row_of(barcode_id)
+        self.beginRemoveRows(QModelIndex(), row, row)
+        self.pool.allocate([barcode_id])
+        self.endRemoveRows()
+
+    def release(self, barcode_id: int) -> None:
+        """Release a barcode of the kit, its row is inserted at its old place"""
+        row = self.pool.row_of(barcode_id)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.pool.release([barcode_id])
+        self.endInsertRows()
@@ -1,5 +1,8 @@
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
+
+import numpy as np
 import pandas as pd
-from natsort import natsort_keygen
 
 
 from PySide6.QtWidgets import (
@@ -26,22 +29,134 @@ from PySide6.QtCore import (
 from PySide6 import QtCore, QtGui, QtWidgets
 from PySide6.QtGui import QAction
 
-from ..enums.enums import VERTICAL_HEADER
+from ..enums.enums import (
+    SampleClass,
+    SAMPLE_CLASS_COLORS,
+)
+from ..core.sample_sheet import (
+    SORT_ORDER,
+    classify_samples,
+    conform_rows,
+    make_sort_keys,
+)
+from ..plate.plate_geometry import PlateGeometry
+from ..tracing.spans import counted, traced
+from ..undo.commands import EditCellsCommand
+
+
+def _gallop_right(keys: list, key, low: int) -> int:
+    """
+    bisect_right from low with an exponential search first, cheap when the
+    insertion point is close to low, e.g. for a run of sorted keys
+    """
+    step = 1
+    high = low
+    while high < len(keys) and not key < keys[high]:
+        low = high + 1
+        high = low + step
+        step *= 2
+    return bisect_right(keys, key, low, min(high, len(keys)))
+
+
+def _contiguous_blocks(values: list, step: int = 1) -> list:
+    """
+    Split sorted values into (start, stop) slices where consecutive values
+    differ by exactly step
+    """
+    blocks = []
+    start = 0
+    for i in range(1, len(values) + 1):
+        if i == len(values) or values[i] - values[i - 1] != step:
+            blocks.append((start, i))
+            start = i
+    return blocks
 
 
 class PandasModel(QAbstractTableModel):
-    """A model to interface a Qt view with pandas dataframe"""
+    """
+    A model to interface a Qt view with pandas dataframe
 
-    def __init__(self, dataframe: pd.DataFrame, parent=None):
+    Removed samples stay in the dataframe with a tombstone and keep their
+    place in the sort order, the view sees only the live rows through an
+    index map. _data, row_ids and row_classes are the live rows, in the
+    order of the view.
+    """
+
+    # QBrush per SampleClass code, shared by all models and built on first use
+    _class_brushes = None
+    # rows handed to the view per fetchMore call
+    fetch_batch_size = 256
+
+    def __init__(
+        self,
+        dataframe: pd.DataFrame,
+        parent=None,
+        plate_geometry: PlateGeometry = None,
+    ):
         QAbstractTableModel.__init__(self, parent)
-        self._data = dataframe
-        self._original_data = self._data.copy()
+        # every row, removed samples included, in sort order
+        self._frame = dataframe
+        self._original_data = self._frame.copy()
 
-        self.v_header = VERTICAL_HEADER
-        self.sortby = {"order": True, "sample_id": True}
-        self.removed_samples_df = pd.DataFrame()
+        # the vertical header shows the well of every row
+        self.plate_geometry = plate_geometry or PlateGeometry()
+        self.sortby = dict(SORT_ORDER)
+        # edits made in the view are pushed here as undoable commands when set
+        self.undo_stack = None
+        # stable id of every row, follows the row when the sheet is re-sorted
+        self._ids = np.arange(self._frame.shape[0], dtype=np.int64)
+        self._next_row_id = self._frame.shape[0]
+        # tombstones of the removed samples, aligned with the rows of self._frame
+        self._removed = np.zeros(self._frame.shape[0], dtype=bool)
+        # row of the view -> row of self._frame, None while no sample is removed
+        self._live = None
+        # the live rows of _data, row_ids and row_classes, built when asked for
+        self._live_views = {}
+        # column position -> np.ndarray of display strings, built lazily
+        self._display_cache = {}
+        # natural-sort key of every row, aligned with the rows of self._frame
+        self._sort_keys = None
+        # state of a running batch(), see _commit_batch
+        self._batch_depth = 0
+        self._batch_reset = False
+        self._batch_sort = False
+        self._batch_cells = None
+        self._batch_all_fetched = False
+        # the view only sees the first self._fetched rows, see fetchMore
+        self._fetched = min(self._frame.shape[0], self.fetch_batch_size)
+        self._fetch_pending = False
+        self.update_color_list()
         self.sort()
 
+    @property
+    def _data(self) -> pd.DataFrame:
+        """The live rows, in the order of the view"""
+        if self._live is None:
+            return self._frame
+        return self._live_view(
+            "data", lambda: self._frame.iloc[self._live].reset_index(drop=True)
+        )
+
+    @property
+    def row_ids(self) -> np.ndarray:
+        """The row id of every live row"""
+        if self._live is None:
+            return self._ids
+        return self._live_view("row_ids", lambda: self._ids[self._live])
+
+    @property
+    def row_classes(self) -> np.ndarray:
+        """The SampleClass code of every live row"""
+        if self._live is None:
+            return self._classes
+        return self._live_view("row_classes", lambda: self._classes[self._live])
+
+    def _live_view(self, name: str, build):
+        view = self._live_views.get(name)
+        if view is None:
+            view = self._live_views[name] = build()
+        return view
+
     # drag and drop
     def supportedDropActions(self):
         return Qt.CopyAction | Qt.MoveAction
@@ -49,21 +164,53 @@ class PandasModel(QAbstractTableModel):
     def rowCount(self, parent=QModelIndex()) -> int:
         """Override method from QAbstractTableModel
 
-        Return row count of the pandas DataFrame
+        Return the number of rows fetched into the view so far
         """
         if parent == QModelIndex():
-            return self._data.shape[0]
+            return int(self._fetched)
         return 0
 
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        """Override method from QAbstractTableModel"""
+        if parent == QModelIndex():
+            # a numpy count would hand np.bool_ to Qt, which it rejects
+            return bool(self._fetched < self.live_count())
+        return False
+
+    def fetchMore(self, parent=QModelIndex()) -> None:
+        """
+        Override method from QAbstractTableModel
+
+        Hand the next batch of rows to the view, called by Qt while scrolling.
+        The rows are inserted on the next pass of the event loop, so a view
+        asking for more while it handles another change never nests the insert.
+        """
+        if parent != QModelIndex() or self._fetch_pending:
+            return
+        self._fetch_pending = True
+        QtCore.QTimer.singleShot(0, self._fetch_next_batch)
+
+    def _fetch_next_batch(self) -> None:
+        """Insert the next fetch_batch_size rows into the view"""
+        self._fetch_pending = False
+        remaining = self.live_count() - self._fetched
+        if remaining <= 0:
+            return
+        number = min(remaining, self.fetch_batch_size)
+        self.beginInsertRows(QModelIndex(), self._fetched, self._fetched + number - 1)
+        self._fetched += number
+        self.endInsertRows()
+
     def columnCount(self, parent=QModelIndex()) -> int:
         """Override method from QAbstractTableModel
 
         Return column count of the pandas DataFrame
         """
         if parent == QModelIndex():
-            return self._data.shape[1]
+            return self._frame.shape[1]
         return 0
 
+    @counted("data")
     def data(self, index: QModelIndex, role=Qt.ItemDataRole):
         """
         Return data cell from the pandas DataFrame
@@ -71,16 +218,15 @@ class PandasModel(QAbstractTableModel):
         if not index.isValid():
             return None
 
+        row = index.row()
+        if self._live is not None:
+            row = self._live[row]
+
         if role == Qt.DisplayRole or role == QtCore.Qt.EditRole:
-            return str(self._data.iloc[index.row(), index.column()])
+            return self._strings(index.column())[row]
 
         if role == Qt.BackgroundRole:
-            if index.row() in self.pos_rows:
-                return QtGui.QColor("#e5fab9")
-            elif index.row() in self.neg_rows:
-                return QtGui.QColor("#fc9b90")
-            else:
-                return QtGui.QColor("#b3d0ff")
+            return self.class_brushes()[self._classes[row]]
 
         return None
 
@@ -88,14 +234,14 @@ class PandasModel(QAbstractTableModel):
         self, section: int, orientation: Qt.Orientation, role: Qt.ItemDataRole
     ):
         """
-        Return dataframe v_header as vertical header data and columns as horizontal header data.
+        Return the plate well as vertical header data and columns as horizontal header data.
         """
         if role == Qt.DisplayRole:
             if orientation == Qt.Horizontal:
-                return str(self._data.columns[section])
+                return str(self._frame.columns[section])
 
             if orientation == Qt.Vertical:
-                return str(self.v_header[section])
+                return self.plate_geometry.label(section)
 
         return None
 
@@ -103,8 +249,27 @@ class PandasModel(QAbstractTableModel):
         if not index.isValid():
             return False
 
-        self._data.iloc[index.row(), index.column()] = value
-        self.sort()
+        row, column = index.row(), index.column()
+        name = self._frame.columns[column]
+        if self._batch_depth:
+            self.set_cells([row], [name], value)
+            return True
+        position = self._positions([row])[0]
+        if self.undo_stack is not None:
+            # editors commit on close even when nothing was changed
+            if self._frame.iat[position, column] != value:
+                self.undo_stack.push(
+                    EditCellsCommand(self, [row], [name], value, f"Edit {name}")
+                )
+            return True
+
+        self._frame.iloc[position, column] = value
+        self._refresh_rows([position], [column])
+
+        # only edits to the sorting columns can move the row
+        if name in self.sortby:
+            row = self._resort_row(row)
+        self._emit_data_changed(row, column, row, column)
         return True
 
     def flags(self, index):
@@ -123,34 +288,572 @@ class PandasModel(QAbstractTableModel):
             | Qt.ItemIsDropEnabled
         )
 
-    def addRow(self, value):
-        self._data = self._data.pipe(
-            lambda x: pd.concat([x, value], ignore_index=True)
-        ).fillna(" ")
-        self.sort()
+    @traced
+    def addRow(self, value, row_ids: np.ndarray = None) -> np.ndarray:
+        new_rows = conform_rows(value, self._frame.columns)
+        return self.insert_rows(new_rows, row_ids=row_ids)
+
+    def insert_rows(
+        self, new_rows: pd.DataFrame, row_ids: np.ndarray = None
+    ) -> np.ndarray:
+        """
+        Insert rows at their sorted positions, found by binary search on the cached
+        sort keys. Every contiguous block of new rows gets its own beginInsertRows.
+        Rows get new ids unless row_ids is given (e.g. to undo a removal),
+        the ids of the rows are returned.
+        """
+        if row_ids is None:
+            row_ids = self.new_row_ids(new_rows.shape[0])
+        keys = self._make_sort_keys(new_rows)
+        block_order = sorted(range(len(keys)), key=keys.__getitem__)
+        new_rows = new_rows.iloc[block_order]
+        keys = [keys[i] for i in block_order]
+        ids = np.asarray(row_ids, dtype=np.int64)[block_order]
+
+        if self._batch_depth:
+            # appended for now, sorted into place when the batch commits
+            self._begin_batch_reset()
+            self._frame = pd.concat([self._frame, new_rows], ignore_index=True)
+            self._ids = np.concatenate([self._ids, ids])
+            self._removed = np.concatenate(
+                [self._removed, np.zeros(len(ids), dtype=bool)]
+            )
+            self._sort_keys.extend(keys)
+            self._batch_sort = True
+            self._update_live()
+            return row_ids
+
+        # new rows go after equal keys, which keeps the sort stable
+        positions = [bisect_right(self._sort_keys, key) for key in keys]
+        blocks = _contiguous_blocks(positions, step=0)
+        # insert from the bottom so the positions above stay valid
+        for start, stop in reversed(blocks):
+            self._insert_block(
+                positions[start],
+                new_rows.iloc[start:stop],
+                keys[start:stop],
+                ids[start:stop],
+            )
+        return row_ids
+
+    def sorted_rows(self, new_rows: pd.DataFrame) -> tuple:
+        """
+        Conform new rows to the columns of the sheet and sort them, returns the
+        rows and their sort keys. Only reads the columns and sortby, so a
+        background reader can call it on its own thread.
+        """
+        new_rows = conform_rows(new_rows, self._frame.columns)
+        keys = self._make_sort_keys(new_rows)
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        return new_rows.iloc[order], [keys[i] for i in order]
+
+    def append_rows(self, new_rows: pd.DataFrame, keys: list = None) -> None:
+        """
+        Merge a chunk of rows from a background reader into the sorted frame.
+        keys are the sort keys of the rows when they were already sorted with
+        sorted_rows, the merge then only searches the place of every new row.
+        The number of fetched rows stays the same, rows pushed out of the view
+        come back with fetchMore, so at most one layout change is emitted.
+        """
+        if keys is None:
+            new_rows, keys = self.sorted_rows(new_rows)
+        if self._batch_depth:
+            self.insert_rows(new_rows)
+            return
+        n_rows, n_new = self._frame.shape[0], new_rows.shape[0]
+        if not n_new:
+            return
+
+        # new rows go after equal keys, the keys are sorted so every search
+        # starts where the last one ended
+        positions = np.empty(n_new, dtype=int)
+        low = 0
+        for i, key in enumerate(keys):
+            low = positions[i] = _gallop_right(self._sort_keys, key, low)
+        # where the old and the new rows end up in the merged frame
+        new_at = positions + np.arange(n_new)
+        old_at = np.arange(n_rows) + np.searchsorted(
+            positions, np.arange(n_rows), side="right"
+        )
+        order = np.empty(n_rows + n_new, dtype=int)
+        order[old_at] = np.arange(n_rows)
+        order[new_at] = np.arange(n_rows, n_rows + n_new)
+        # the old keys are copied in runs between the new ones
+        merged_keys = []
+        start = 0
+        for position, key in zip(positions.tolist(), keys):
+            merged_keys.extend(self._sort_keys[start:position])
+            merged_keys.append(key)
+            start = position
+        merged_keys.extend(self._sort_keys[start:])
+
+        # the first new row the view shows, removed samples are not shown
+        first_shown = np.count_nonzero(~self._removed[: positions[0]])
+        visible_changed = first_shown < self._fetched
+
+        self._frame = pd.concat([self._frame, new_rows], ignore_index=True)
+        self._ids = np.concatenate([self._ids, self.new_row_ids(n_new)])
+        self._classes = np.concatenate(
+            [self._classes, classify_samples(new_rows["sample_id"])]
+        )
+        self._removed = np.concatenate([self._removed, np.zeros(n_new, dtype=bool)])
+        for column, strings in self._display_cache.items():
+            self._display_cache[column] = np.concatenate(
+                [strings, new_rows.iloc[:, column].astype(str).to_numpy(dtype=object)]
+            )
+        if visible_changed:
+            # rows pushed past the fetched rows get an invalid index
+            self._reorder(order, sort_keys=merged_keys)
+        else:
+            self._apply_row_order(order, sort_keys=merged_keys)
+
+    def remove_rows(self, rows: list) -> pd.DataFrame:
+        """Remove the rows at the given positions and return them as a dataframe"""
+        rows = np.unique(rows).tolist()
+        positions = self._positions(rows)
+        removed = self._frame.iloc[positions].reset_index(drop=True)
+        if self._batch_depth:
+            self._begin_batch_reset()
+            self._delete_positions(positions)
+            return removed
+
+        # remove from the bottom so the positions above stay valid
+        for start, stop in reversed(_contiguous_blocks(rows)):
+            first, last = rows[start], rows[stop - 1]
+            # only rows that are fetched into the view are announced
+            visible = min(last, self._fetched - 1) - first + 1
+            if visible > 0:
+                self.beginRemoveRows(QModelIndex(), first, first + visible - 1)
+            self._delete_positions(positions[start:stop])
+            if visible > 0:
+                self._fetched -= visible
+                self.endRemoveRows()
+        return removed
+
+    def remove_samples(self, row_ids) -> None:
+        """
+        Take rows out of the view as removed samples. The rows only get a
+        tombstone, they keep their place in the sorted frame so
+        restore_samples puts them back where they were.
+        """
+        positions = np.sort(self._positions(self.rows_of(row_ids)))
+        if self._batch_depth:
+            self._begin_batch_reset()
+            self._removed[positions] = True
+            self._update_live()
+            return
+
+        rows = self._view_rows(positions).tolist()
+        # remove from the bottom so the rows above stay valid
+        for start, stop in reversed(_contiguous_blocks(rows)):
+            first, last = rows[start], rows[stop - 1]
+            visible = min(last, self._fetched - 1) - first + 1
+            if visible > 0:
+                self.beginRemoveRows(QModelIndex(), first, first + visible - 1)
+            self._removed[positions[start:stop]] = True
+            self._update_live()
+            if visible > 0:
+                self._fetched -= visible
+                self.endRemoveRows()
+
+    def restore_samples(self, row_ids) -> None:
+        """Clear the tombstones of removed samples, they come back at their place"""
+        positions = np.sort(self._ids_positions(row_ids))
+        if self._batch_depth:
+            self._begin_batch_reset()
+            self._removed[positions] = False
+            self._update_live()
+            return
+
+        # the rows the samples get in the view once they are all back
+        removed = self._removed.copy()
+        removed[positions] = False
+        rows = np.searchsorted(np.flatnonzero(~removed), positions).tolist()
+        # insert from the top, the rows below are not back yet
+        for start, stop in _contiguous_blocks(rows):
+            first = rows[start]
+            # rows below the fetched rows are not announced
+            visible = first <= self._fetched
+            if visible:
+                self.beginInsertRows(QModelIndex(), first, first + stop - start - 1)
+            self._removed[positions[start:stop]] = False
+            self._update_live()
+            if visible:
+                self._fetched += stop - start
+                self.endInsertRows()
 
-        self.dataChanged.emit(QtCore.QModelIndex(), QtCore.QModelIndex())
+    def removed_samples(self, row_ids) -> pd.DataFrame:
+        """The rows of removed samples, by their row ids"""
+        return self._frame.iloc[self._ids_positions(row_ids)]
+
+    def cells(self, rows: list, columns: list) -> np.ndarray:
+        """The values in the given rows and (named) columns"""
+        columns_at = [self.find_column_index(column) for column in columns]
+        return self._frame.iloc[self._positions(rows), columns_at].to_numpy(
+            dtype=object
+        )
+
+    def set_cells(self, rows: list, columns: list, values) -> None:
+        """
+        Write values into the given rows and (named) columns, emitting
+        dataChanged for just that range
+        """
+        columns_at = [self.find_column_index(column) for column in columns]
+        positions = self._positions(rows)
+        self._frame.iloc[positions, columns_at] = values
+        self._refresh_rows(positions, columns_at)
+        if self._batch_depth:
+            # grow the range of changed cells that is emitted on commit
+            top, left = min(rows), min(columns_at)
+            bottom, right = max(rows), max(columns_at)
+            if self._batch_cells is not None:
+                old_top, old_left, old_bottom, old_right = self._batch_cells
+                top, left = min(top, old_top), min(left, old_left)
+                bottom, right = max(bottom, old_bottom), max(right, old_right)
+            self._batch_cells = (top, left, bottom, right)
+        if self.sortby.keys() & set(columns):
+            self.sort()
+        if self._batch_depth:
+            return
+
+        self._emit_data_changed(min(rows), min(columns_at), max(rows), max(columns_at))
+
+    def set_dataframe(self, dataframe: pd.DataFrame) -> None:
+        """Replace the whole dataframe, every cache is rebuilt"""
+        if self._batch_depth:
+            self._begin_batch_reset()
+            self._frame = dataframe
+            self._ids = self.new_row_ids(self._frame.shape[0])
+            self._removed = np.zeros(self._frame.shape[0], dtype=bool)
+            self._sort_keys = self._make_sort_keys(self._frame)
+            self._batch_sort = True
+            self._update_live()
+            return
+
+        self.beginResetModel()
+        self._frame = dataframe
+        self._ids = self.new_row_ids(self._frame.shape[0])
+        self._removed = np.zeros(self._frame.shape[0], dtype=bool)
+        self.invalidate_display_cache()
+        self.update_color_list()
+        self._sort_keys = self._make_sort_keys(self._frame)
+        order = sorted(range(len(self._sort_keys)), key=self._sort_keys.__getitem__)
+        self._apply_row_order(order)
+        self._fetched = min(self._frame.shape[0], self.fetch_batch_size)
+        self.endResetModel()
+
+    @traced
+    def sort(self, index: int = None, role=None) -> bool:
+        """
+        Sort with the cached keys, persistent indexes follow their rows.
+        Returns whether the rows moved, which is announced with a layout change
+        """
+        if self._batch_depth:
+            self._batch_sort = True
+            return False
+        if self._sort_keys is None:
+            self._sort_keys = self._make_sort_keys(self._frame)
+        order = sorted(range(len(self._sort_keys)), key=self._sort_keys.__getitem__)
+        # nothing to do if the rows are already in order
+        if order == list(range(len(order))):
+            return False
+        self._reorder(order)
+        return True
+
+    def _reorder(self, order, sort_keys: list = None) -> None:
+        """Put the rows in the given order with a layout change of the view"""
+        self.layoutAboutToBeChanged.emit()
+        old_positions = self._positions(np.arange(self.live_count()))
+        old_indexes = self.persistentIndexList()
+        self._apply_row_order(order, sort_keys)
+        new_position = np.empty(len(order), dtype=int)
+        new_position[order] = np.arange(len(order))
+        new_row = self._view_rows(new_position[old_positions])
+        self.changePersistentIndexList(
+            old_indexes,
+            [self.index(new_row[i.row()], i.column()) for i in old_indexes],
+        )
         self.layoutChanged.emit()
 
-    def sort(self, index: int = None, role=None):
-        if self.sortby:
-            columns = [col for col in self.sortby.keys()]
-            order = [x for x in self.sortby.values()]
-            self._data = self._data.sort_values(
-                columns, ascending=order, key=natsort_keygen()
-            ).reset_index(drop=True)
+    @contextmanager
+    def batch(self):
+        """
+        Group several edits into one transaction. Sorting, rebuilding the row
+        classes and signal emission wait until the outermost batch commits,
+        which then emits a single notification:
+
+            with model.batch():
+                model.remove_rows(rows)
+                model.addRow(controls)
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self._commit_batch()
+
+    def _begin_batch_reset(self) -> None:
+        """Rows are added or removed in the batch, the commit becomes a model reset"""
+        if not self._batch_reset:
+            self.beginResetModel()
+            self._batch_reset = True
+            self._batch_all_fetched = self._fetched == self.live_count()
+
+    def _commit_batch(self) -> None:
+        """Apply the deferred work of a batch and emit one coalesced notification"""
+        reset, needs_sort, cells = (
+            self._batch_reset,
+            self._batch_sort,
+            self._batch_cells,
+        )
+        self._batch_reset, self._batch_sort, self._batch_cells = False, False, None
+
+        if reset:
+            self.invalidate_display_cache()
             self.update_color_list()
-            self.dataChanged.emit(QtCore.QModelIndex(), QtCore.QModelIndex())
-            self.layoutChanged.emit()
+            if needs_sort:
+                order = sorted(
+                    range(len(self._sort_keys)), key=self._sort_keys.__getitem__
+                )
+                self._apply_row_order(order)
+            # a sheet that was fully fetched stays that way
+            if self._batch_all_fetched:
+                self._fetched = self.live_count()
+            else:
+                self._fetched = min(self._fetched, self.live_count())
+            self.endResetModel()
+        else:
+            # the layout change of a sort also covers the edited cells, but a
+            # sort that leaves the rows in place emits nothing
+            moved = needs_sort and self.sort()
+            if not moved and cells is not None:
+                self._emit_data_changed(*cells)
+
+    def _emit_data_changed(self, top: int, left: int, bottom: int, right: int) -> None:
+        """Emit dataChanged for the part of the range that is fetched into the view"""
+        bottom = min(bottom, self._fetched - 1)
+        if top <= bottom:
+            self.dataChanged.emit(self.index(top, left), self.index(bottom, right))
+
+    def _make_sort_keys(self, frame: pd.DataFrame) -> list:
+        """Return the natural-sort key of every row in frame for the columns in self.sortby"""
+        return make_sort_keys(frame, self.sortby)
+
+    def _apply_row_order(self, order, sort_keys: list = None) -> None:
+        """
+        Reorder the rows and every per-row cache to the given positions.
+        sort_keys can be passed when the keys are already in the new order.
+        """
+        self._frame = self._frame.iloc[order].reset_index(drop=True)
+        self._ids = self._ids[order]
+        self._classes = self._classes[order]
+        self._removed = self._removed[order]
+        for column, strings in self._display_cache.items():
+            self._display_cache[column] = strings[order]
+        if sort_keys is not None:
+            self._sort_keys = sort_keys
+        elif self._sort_keys is not None:
+            self._sort_keys = [self._sort_keys[i] for i in order]
+        self._update_live()
+
+    def _insert_block(
+        self, position: int, block: pd.DataFrame, keys: list, row_ids: np.ndarray
+    ) -> None:
+        """Insert already sorted rows as one contiguous block at position"""
+        row = self._view_rows([position])[0]
+        # rows inserted below the fetched rows are not announced to the view
+        visible = row <= self._fetched
+        if visible:
+            self.beginInsertRows(QModelIndex(), row, row + block.shape[0] - 1)
+        self._frame = pd.concat(
+            [self._frame.iloc[:position], block, self._frame.iloc[position:]],
+            ignore_index=True,
+        )
+        self._ids = np.insert(self._ids, position, row_ids)
+        self._classes = np.insert(
+            self._classes, position, classify_samples(block["sample_id"])
+        )
+        self._removed = np.insert(
+            self._removed, position, np.zeros(block.shape[0], dtype=bool)
+        )
+        for column, strings in self._display_cache.items():
+            self._display_cache[column] = np.insert(
+                strings,
+                position,
+                block.iloc[:, column].astype(str).to_numpy(dtype=object),
+            )
+        self._sort_keys[position:position] = keys
+        self._update_live()
+        if visible:
+            self._fetched += block.shape[0]
+            self.endInsertRows()
+
+    def _delete_positions(self, positions: np.ndarray) -> None:
+        """Delete rows of self._frame and of every per-row cache"""
+        keep = np.ones(self._frame.shape[0], dtype=bool)
+        keep[positions] = False
+        self._frame = self._frame.iloc[keep].reset_index(drop=True)
+        self._ids = self._ids[keep]
+        self._removed = self._removed[keep]
+        if not self._batch_reset:
+            self._classes = self._classes[keep]
+            for column, strings in self._display_cache.items():
+                self._display_cache[column] = strings[keep]
+        self._sort_keys = [key for key, kept in zip(self._sort_keys, keep) if kept]
+        self._update_live()
+
+    def _refresh_rows(self, positions: list, columns: list) -> None:
+        """Update the cached strings, classes and sort keys of edited cells"""
+        names = set(self._frame.columns[columns])
+        self._live_views.clear()
+        if names & self.sortby.keys():
+            frame = self._frame.iloc[positions]
+            for position, key in zip(positions, self._make_sort_keys(frame)):
+                self._sort_keys[position] = key
+        if self._batch_reset:
+            # strings and classes are rebuilt when the batch commits
+            return
+
+        for column in columns:
+            strings = self._display_cache.get(column)
+            if strings is not None:
+                strings[positions] = (
+                    self._frame.iloc[positions, column]
+                    .astype(str)
+                    .to_numpy(dtype=object)
+                )
+        if "sample_id" in names:
+            self._classes[positions] = classify_samples(
+                self._frame["sample_id"].iloc[positions]
+            )
+
+    def _resort_row(self, row: int) -> int:
+        """Move a single row whose sort key changed to its sorted position, returns it"""
+        position = self._positions([row])[0]
+        keys = list(self._sort_keys)
+        key = keys.pop(position)
+        # stay as close to the current position as the sort order allows
+        low, high = bisect_left(keys, key), bisect_right(keys, key)
+        new_position = min(max(position, low), high)
+        if new_position == position:
+            return row
+
+        keys.insert(new_position, key)
+        order = list(range(len(keys)))
+        del order[position]
+        order.insert(new_position, position)
+        # removed samples in between do not count as rows of the view
+        new_row = int(np.count_nonzero(~self._removed[order][:new_position]))
+        if new_row == row:
+            # the row only moves past removed samples
+            self._apply_row_order(order, sort_keys=keys)
+            return row
+        if new_row >= self._fetched:
+            # the row moves below the fetched rows and leaves the view
+            self.beginRemoveRows(QModelIndex(), row, row)
+            self._apply_row_order(order, sort_keys=keys)
+            self._fetched -= 1
+            self.endRemoveRows()
+            return new_row
+
+        # Qt wants the destination as the row it is moved in front of
+        destination = new_row + 1 if new_row > row else new_row
+        self.beginMoveRows(QModelIndex(), row, row, QModelIndex(), destination)
+        self._apply_row_order(order, sort_keys=keys)
+        self.endMoveRows()
+        return new_row
+
+    def _update_live(self) -> None:
+        """Rebuild the index map of the view after the tombstones or rows changed"""
+        self._live = np.flatnonzero(~self._removed) if self._removed.any() else None
+        self._live_views.clear()
+
+    def _positions(self, rows) -> np.ndarray:
+        """Rows of self._frame of rows of the view"""
+        rows = np.asarray(rows, dtype=int)
+        if self._live is None:
+            return rows
+        return self._live[rows]
+
+    def _view_rows(self, positions) -> np.ndarray:
+        """Rows of the view of live rows of self._frame"""
+        positions = np.asarray(positions, dtype=int)
+        if self._live is None:
+            return positions
+        return np.searchsorted(self._live, positions)
+
+    def _ids_positions(self, row_ids) -> np.ndarray:
+        """Rows of self._frame of row ids, removed samples included"""
+        positions = pd.Index(self._ids).get_indexer(row_ids)
+        if (positions < 0).any():
+            raise KeyError(
+                f"rows {np.asarray(row_ids)[positions < 0]} are not in the model"
+            )
+        return positions
+
+    def live_count(self) -> int:
+        """Number of rows that are not removed samples"""
+        if self._live is None:
+            return self._frame.shape[0]
+        return len(self._live)
+
+    def new_row_ids(self, count: int) -> np.ndarray:
+        """Hand out count row ids that have not been used in this model"""
+        row_ids = np.arange(
+            self._next_row_id, self._next_row_id + count, dtype=np.int64
+        )
+        self._next_row_id += count
+        return row_ids
+
+    def rows_of(self, row_ids) -> np.ndarray:
+        """Return the current row position of every row id"""
+        rows = pd.Index(self.row_ids).get_indexer(row_ids)
+        if (rows < 0).any():
+            raise KeyError(f"rows {np.asarray(row_ids)[rows < 0]} are not in the model")
+        return rows
 
     def update_color_list(self):
-        self.pos_rows = self._data.loc[
-            lambda x: x.sample_id.str.contains("POS")
-        ].index.to_list()
-        self.neg_rows = self._data.loc[
-            lambda x: x.sample_id.str.contains("NEG")
-        ].index.to_list()
+        """Rebuild the per-row SampleClass codes used for the background colour"""
+        self._classes = classify_samples(self._frame["sample_id"])
+        self._live_views.clear()
+
+    @classmethod
+    def class_brushes(cls) -> list:
+        """Return the cached QBrush for every SampleClass, indexed by class code"""
+        if cls._class_brushes is None:
+            cls._class_brushes = [
+                QtGui.QBrush(QtGui.QColor(SAMPLE_CLASS_COLORS[sample_class]))
+                for sample_class in SampleClass
+            ]
+        return cls._class_brushes
+
+    def _strings(self, column: int) -> np.ndarray:
+        """Return the display strings of a column, building them in one pass if needed"""
+        strings = self._display_cache.get(column)
+        if strings is None:
+            strings = self._frame.iloc[:, column].astype(str).to_numpy(dtype=object)
+            self._display_cache[column] = strings
+        return strings
+
+    def _display_column(self, column: int) -> np.ndarray:
+        """The display strings of a column for the live rows"""
+        if self._live is None:
+            return self._strings(column)
+        return self._live_view(
+            ("strings", column), lambda: self._strings(column)[self._live]
+        )
+
+    def invalidate_display_cache(self, columns: list = None) -> None:
+        """Drop cached display strings for the given column positions, or all columns"""
+        self._live_views.clear()
+        if columns is None:
+            self._display_cache.clear()
+            return
+        for column in columns:
+            self._display_cache.pop(column, None)
 
     def find_column_index(self, col_name: str) -> int:
         """Find index of column with certain name and returns its position"""
-        return self._data.columns.to_list().index(col_name)
+        return self._frame.columns.to_list().index(col_name)
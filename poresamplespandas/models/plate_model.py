@@ -0,0 +1,167 @@
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+from ..plate.plate_geometry import PlateGeometry
+from .pandas_model import PandasModel
+
+
+class PlateModel(QAbstractTableModel):
+    """
+    Lays the rows of a PandasModel out on the wells of one or more plates.
+    Plates are stacked below each other, one block of geometry.rows per plate.
+
+    The model holds no data of its own, every well reads the source row at its
+    position. Changes in the source are translated into dataChanged for the
+    wells whose position is affected, plus inserted or removed plate rows.
+    """
+
+    def __init__(self, source: PandasModel, geometry: PlateGeometry, parent=None):
+        QAbstractTableModel.__init__(self, parent)
+        self.geometry = geometry
+        self.source = None
+        self.set_source_model(source)
+
+    def set_source_model(self, source: PandasModel) -> None:
+        """Show the samples of another PandasModel, e.g. after an import"""
+        self.beginResetModel()
+        if self.source is not None:
+            for signal, slot in self._source_connections():
+                signal.disconnect(slot)
+        self.source = source
+        for signal, slot in self._source_connections():
+            signal.connect(slot)
+        self._on_source_reset()
+
+    def _source_connections(self) -> list:
+        """The signals of the source model and the slots that follow them"""
+        return [
+            (self.source.dataChanged, self._on_source_data_changed),
+            (self.source.rowsInserted, self._on_source_rows_inserted),
+            (self.source.rowsRemoved, self._on_source_rows_removed),
+            (self.source.rowsMoved, self._on_source_rows_moved),
+            (self.source.layoutChanged, self._on_source_layout_changed),
+            (self.source.modelAboutToBeReset, self.beginResetModel),
+            (self.source.modelReset, self._on_source_reset),
+        ]
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        """Override method from QAbstractTableModel"""
+        if parent == QModelIndex():
+            return self._plates * self.geometry.rows
+        return 0
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        """Override method from QAbstractTableModel"""
+        if parent == QModelIndex():
+            return self.geometry.columns
+        return 0
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        """Scrolling to the last plate fetches more rows in the source"""
+        return self.source.canFetchMore(parent)
+
+    def fetchMore(self, parent=QModelIndex()) -> None:
+        self.source.fetchMore(parent)
+
+    def data(self, index: QModelIndex, role=Qt.ItemDataRole):
+        """Return the sample id and colour of the source row in a well"""
+        if not index.isValid():
+            return None
+
+        plate, row = divmod(index.row(), self.geometry.rows)
+        position = self.geometry.position(row, index.column(), plate)
+        if position >= self._samples:
+            return None
+
+        if role == Qt.DisplayRole or role == Qt.ToolTipRole:
+            return self.source._display_column(self._sample_column)[position]
+
+        if role == Qt.BackgroundRole:
+            return self.source.class_brushes()[self.source.row_classes[position]]
+
+        return None
+
+    def headerData(
+        self, section: int, orientation: Qt.Orientation, role: Qt.ItemDataRole
+    ):
+        """Return the row letters, prefixed with the plate after the first plate"""
+        if role == Qt.DisplayRole:
+            if orientation == Qt.Horizontal:
+                return str(section + 1)
+
+            if orientation == Qt.Vertical:
+                plate, row = divmod(section, self.geometry.rows)
+                name = self.geometry.row_names[row]
+                return f"P{plate + 1}-{name}" if plate else name
+
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    def _on_source_data_changed(self, top_left, bottom_right, roles=()):
+        self._positions_changed(top_left.row(), bottom_right.row())
+
+    def _on_source_rows_inserted(self, parent, first, last):
+        # every sample from the first inserted row on shifts to another well
+        self._samples_changed(first)
+
+    def _on_source_rows_removed(self, parent, first, last):
+        self._samples_changed(first)
+
+    def _on_source_rows_moved(self, parent, start, end, destination, row):
+        self._positions_changed(min(start, row), max(end, row - 1))
+
+    def _on_source_layout_changed(self, parents=(), hint=None):
+        self._samples_changed(0)
+
+    def _on_source_reset(self):
+        self._samples = self.source.rowCount()
+        self._plates = self.geometry.plates_needed(self._samples)
+        self._sample_column = self.source.find_column_index("sample_id")
+        self.endResetModel()
+
+    def _samples_changed(self, first: int) -> None:
+        """The source rows from first on changed and their number may differ"""
+        old_samples = self._samples
+        self._samples = self.source.rowCount()
+        plates = self.geometry.plates_needed(self._samples)
+        rows = self.geometry.rows
+        if plates > self._plates:
+            self.beginInsertRows(QModelIndex(), self._plates * rows, plates * rows - 1)
+            self._plates = plates
+            self.endInsertRows()
+        elif plates < self._plates:
+            self.beginRemoveRows(QModelIndex(), plates * rows, self._plates * rows - 1)
+            self._plates = plates
+            self.endRemoveRows()
+        # wells that lost their sample are repainted empty as well
+        self._positions_changed(first, max(old_samples, self._samples) - 1)
+
+    def _positions_changed(self, first: int, last: int) -> None:
+        """Emit dataChanged for the wells of positions first to last, per plate"""
+        last = min(last, self._plates * self.geometry.wells_per_plate - 1)
+        if first > last:
+            return
+
+        geometry = self.geometry
+        first_plate, last_plate = (
+            first // geometry.wells_per_plate,
+            last // geometry.wells_per_plate,
+        )
+        for plate in range(first_plate, last_plate + 1):
+            start = max(first, plate * geometry.wells_per_plate)
+            stop = min(last, (plate + 1) * geometry.wells_per_plate - 1)
+            start_row, start_column, _ = geometry.coordinates(start)
+            stop_row, stop_column, _ = geometry.coordinates(stop)
+            # a range spanning several columns (rows) covers them completely
+            if geometry.column_major and start_column != stop_column:
+                start_row, stop_row = 0, geometry.rows - 1
+            if not geometry.column_major and start_row != stop_row:
+                start_column, stop_column = 0, geometry.columns - 1
+            offset = plate * geometry.rows
+            self.dataChanged.emit(
+                self.index(offset + start_row, start_column),
+                self.index(offset + stop_row, stop_column),
+            )
@@ -0,0 +1,104 @@
+import numpy as np
+
+from ..enums.enums import PLATE_FORMATS
+
+
+def row_name(row: int) -> str:
+    """Return the letter name of a plate row: A..Z, AA, AB.. for large formats"""
+    name = ""
+    row += 1
+    while row:
+        row, remainder = divmod(row - 1, 26)
+        name = chr(ord("A") + remainder) + name
+    return name
+
+
+class PlateGeometry:
+    """
+    Arithmetic mapping between the running position of a sample in the sheet and
+    its well, for any plate format and for runs spanning several plates.
+
+    Positions fill a plate in column-major order (A1, B1, .. H1, A2) by default,
+    or row-major order (A1, A2, .. A12, B1), then continue on the next plate.
+    """
+
+    def __init__(
+        self,
+        rows: int = 8,
+        columns: int = 12,
+        column_major: bool = True,
+        plates: int = None,
+    ):
+        self.rows = rows
+        self.columns = columns
+        self.column_major = column_major
+        # None means as many plates as the sheet needs
+        self.plates = plates
+        self.row_names = [row_name(row) for row in range(rows)]
+
+    @classmethod
+    def from_wells(cls, wells: int, **kwargs) -> "PlateGeometry":
+        """Geometry of a standard plate format, e.g. 96, 384 or 1536 wells"""
+        rows, columns = PLATE_FORMATS[wells]
+        return cls(rows=rows, columns=columns, **kwargs)
+
+    @property
+    def wells_per_plate(self) -> int:
+        return self.rows * self.columns
+
+    def plates_needed(self, samples: int) -> int:
+        """Number of plates needed for a number of samples, at least one"""
+        return max(1, -(-samples // self.wells_per_plate))
+
+    def coordinates(self, position: int) -> tuple:
+        """Return the (row, column, plate) of a position"""
+        if position < 0 or (
+            self.plates is not None and position >= self.plates * self.wells_per_plate
+        ):
+            raise IndexError(f"position {position} is outside of the plates")
+        plate, well = divmod(position, self.wells_per_plate)
+        if self.column_major:
+            column, row = divmod(well, self.rows)
+        else:
+            row, column = divmod(well, self.columns)
+        return row, column, plate
+
+    def position(self, row: int, column: int, plate: int = 0) -> int:
+        """Return the position of a well, the inverse of coordinates"""
+        if self.column_major:
+            well = column * self.rows + row
+        else:
+            well = row * self.columns + column
+        return plate * self.wells_per_plate + well
+
+    def well_name(self, position: int) -> str:
+        """Name of the well of a position, e.g. A1, without the plate"""
+        row, column, _ = self.coordinates(position)
+        return f"{self.row_names[row]}{column + 1}"
+
+    def label(self, position: int) -> str:
+        """
+        Well name of a position. Wells of the first plate keep their plain name,
+        wells of later plates are prefixed with the plate, e.g. P2-A1.
+        """
+        row, column, plate = self.coordinates(position)
+        well = f"{self.row_names[row]}{column + 1}"
+        return f"P{plate + 1}-{well}" if plate else well
+
+    def labels(self, samples: int) -> list:
+        """Labels of the first number of positions, computed array-wise"""
+        if self.plates is not None and samples > self.plates * self.wells_per_plate:
+            raise IndexError(f"{samples} samples do not fit on {self.plates} plates")
+        plate, well = np.divmod(np.arange(samples), self.wells_per_plate)
+        if self.column_major:
+            column, row = np.divmod(well, self.rows)
+        else:
+            row, column = np.divmod(well, self.columns)
+        return [
+            (
+                f"P{p + 1}-{self.row_names[r]}{c + 1}"
+                if p
+                else f"{self.row_names[r]}{c + 1}"
+            )
+            for r, c, p in zip(row.tolist(), column.tolist(), plate.tolist())
+        ]
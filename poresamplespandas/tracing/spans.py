@@ -0,0 +1,224 @@
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from pathlib import Path
+
+from ..import_data.import_cache import CACHE_DIR
+
+# Qt must not be imported from here, the command line is traced as well
+
+# tracing is off unless PORESAMPLES_TRACE is set, e.g. PORESAMPLES_TRACE=1
+ENABLED = os.environ.get("PORESAMPLES_TRACE", "") not in ("", "0")
+TRACE_DIR = CACHE_DIR / "traces"
+# events per trace file, a full file is rotated to trace.1.json and so on
+TRACE_FILE_EVENTS = 50_000
+# rotated trace files that are kept
+TRACE_FILES = 5
+# spans of the main thread that are kept to find the cause of a stall
+RECENT_SPANS = 64
+
+
+def timestamp() -> int:
+    """Microseconds, the unit of the Chrome trace format"""
+    return time.perf_counter_ns() // 1000
+
+
+class Tracer:
+    """
+    Records timed spans and counters in the Chrome trace event format, which
+    chrome://tracing, Perfetto and speedscope load. The events are written to
+    trace.json in directory when a file is full and at exit, older files are
+    rotated to trace.1.json up to trace.<files>.json.
+    """
+
+    def __init__(
+        self,
+        directory: Path = TRACE_DIR,
+        file_events: int = TRACE_FILE_EVENTS,
+        files: int = TRACE_FILES,
+    ):
+        self.directory = Path(directory)
+        self.file_events = file_events
+        self.files = files
+        self.path = self.directory / "trace.json"
+        self.pid = os.getpid()
+        self.counts = {}
+        self.events = []
+        # (name, start) of the spans running on every thread, innermost last
+        self.active = {}
+        # (name, start, end) of the last spans of the main thread
+        self.recent = deque(maxlen=RECENT_SPANS)
+        # name -> (duration, args) of the last span of every name
+        self.last = {}
+        self.stalls = 0
+        self._lock = threading.Lock()
+        self._rotate_on_write = True
+
+    @contextmanager
+    def span(self, name: str, counters: tuple = (), **args):
+        """
+        Time the block as a span of name. The calls to every counter in
+        counters during the block are added to the args of the span.
+        """
+        thread = threading.get_ident()
+        stack = self.active.setdefault(thread, [])
+        counts = [self.counts.get(counter, 0) for counter in counters]
+        start = timestamp()
+        stack.append((name, start))
+        try:
+            yield
+        finally:
+            end = timestamp()
+            stack.pop()
+            for counter, count in zip(counters, counts):
+                args[f"{counter} calls"] = self.counts.get(counter, 0) - count
+            if thread == threading.main_thread().ident:
+                self.recent.append((name, start, end))
+            self.last[name] = (end - start, args)
+            self.add_event(
+                {
+                    "name": name,
+                    "ph": "X",
+                    "ts": start,
+                    "dur": end - start,
+                    "args": args,
+                },
+                thread,
+            )
+
+    def count(self, name: str, calls: int = 1) -> None:
+        self.counts[name] = self.counts.get(name, 0) + calls
+
+    def stall(self, start: int, end: int) -> list:
+        """
+        Record that the main thread did not get to the event loop from start
+        to end, returns the spans that ran then with their durations
+        """
+        main = threading.main_thread().ident
+        spans = [
+            (name, begin, stop) for name, begin, stop in self.recent if stop >= start
+        ]
+        spans += [(name, begin, end) for name, begin in self.active.get(main, [])]
+        spans = [
+            f"{name} {(stop - begin) / 1000:.0f} ms" for name, begin, stop in spans
+        ]
+        self.stalls += 1
+        self.add_event(
+            {
+                "name": "stall",
+                "ph": "X",
+                "ts": start,
+                "dur": end - start,
+                "args": {"spans": spans},
+            },
+            main,
+        )
+        return spans
+
+    def add_event(self, event: dict, thread: int) -> None:
+        event["pid"] = self.pid
+        event["tid"] = thread
+        with self._lock:
+            self.events.append(event)
+            if len(self.events) >= self.file_events:
+                self._write()
+
+    def flush(self) -> None:
+        """Write the events that have not been written yet"""
+        with self._lock:
+            if self.events:
+                self._write()
+
+    def _write(self) -> None:
+        """Write the events to a new trace.json, the older files move up by one"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if self._rotate_on_write:
+            for number in range(self.files - 1, 0, -1):
+                older = self.directory / f"trace.{number}.json"
+                if older.exists():
+                    os.replace(older, self.directory / f"trace.{number + 1}.json")
+            if self.path.exists():
+                os.replace(self.path, self.directory / "trace.1.json")
+        handle, temp_path = tempfile.mkstemp(
+            dir=self.directory, prefix=".trace.", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(handle, "w") as f:
+                json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, f)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        # a file that is not full is written again with the rest of its events
+        self._rotate_on_write = len(self.events) >= self.file_events
+        if self._rotate_on_write:
+            self.events = []
+
+    def summary(self) -> str:
+        """The last repaint and the slowest of the last spans, for the status bar"""
+        parts = []
+        if "repaint" in self.last:
+            duration, args = self.last["repaint"]
+            parts.append(
+                f"repaint {duration / 1000:.1f} ms, {args.get('data calls', 0)} data()"
+            )
+        spans = [span for span in self.recent if span[0] != "repaint"]
+        if spans:
+            name, start, end = max(spans, key=lambda span: span[2] - span[1])
+            parts.append(f"slowest {name} {(end - start) / 1000:.1f} ms")
+        parts.append(f"{self.stalls} stalls")
+        return " | ".join(parts)
+
+
+# the tracer of the process, None when tracing is off
+tracer = None
+if ENABLED:
+    tracer = Tracer()
+    atexit.register(tracer.flush)
+
+
+def span(name: str, counters: tuple = (), **args):
+    """Tracer.span of the process tracer, does nothing when tracing is off"""
+    if tracer is None:
+        return nullcontext()
+    return tracer.span(name, counters, **args)
+
+
+def traced(function):
+    """
+    Trace every call of function as a span named after it. When tracing is
+    off function is returned as it is, so it costs nothing.
+    """
+    if tracer is None:
+        return function
+    name = function.__qualname__
+
+    @wraps(function)
+    def traced_function(*args, **kwargs):
+        with tracer.span(name):
+            return function(*args, **kwargs)
+
+    return traced_function
+
+
+def counted(name: str):
+    """Count the calls of the decorated function, nothing when tracing is off"""
+
+    def decorator(function):
+        if tracer is None:
+            return function
+
+        @wraps(function)
+        def counted_function(*args, **kwargs):
+            tracer.count(name)
+            return function(*args, **kwargs)
+
+        return counted_function
+
+    return decorator
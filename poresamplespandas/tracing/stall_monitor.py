@@ -0,0 +1,44 @@
+from PySide6.QtCore import QObject, QTimer, Signal
+
+from .spans import Tracer, timestamp
+
+# the event loop should get to every timer within this many milliseconds
+FRAME_BUDGET_MS = 50
+# how often the event loop is checked, in milliseconds
+CHECK_INTERVAL_MS = 10
+
+
+class StallMonitor(QObject):
+    """
+    Watches the latency of the event loop with a timer. When the timer fires
+    more than budget_ms late the window was frozen for that long, the stall is
+    recorded with the spans that ran during it and stalled is emitted.
+    """
+
+    # milliseconds the event loop was blocked, the spans that ran then
+    stalled = Signal(int, list)
+
+    def __init__(
+        self,
+        tracer: Tracer,
+        budget_ms: int = FRAME_BUDGET_MS,
+        interval_ms: int = CHECK_INTERVAL_MS,
+        parent=None,
+    ):
+        super(StallMonitor, self).__init__(parent)
+        self.tracer = tracer
+        self.budget = budget_ms * 1000
+        self.interval = interval_ms * 1000
+        self._last_tick = timestamp()
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.check)
+        self.timer.start(interval_ms)
+
+    def check(self) -> None:
+        now = timestamp()
+        # the timer was due one interval after the last tick
+        due = self._last_tick + self.interval
+        self._last_tick = now
+        if now - due > self.budget:
+            spans = self.tracer.stall(due, now)
+            self.stalled.emit((now - due) // 1000, spans)
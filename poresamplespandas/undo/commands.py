@@ -0,0 +1,201 @@
+from contextlib import nullcontext
+
+import numpy as np
+import pandas as pd
+
+from PySide6.QtGui import QUndoCommand
+
+# commands with the same id are merged by the undo stack
+CONTROLS_COMMAND_ID = 1
+
+
+class EditCellsCommand(QUndoCommand):
+    """
+    Values written into cells of the sample sheet. Only the old and new values
+    of those cells are kept, the rows are found again by their row ids.
+    """
+
+    def __init__(self, model, rows: list, columns: list, values, text: str = ""):
+        super().__init__(text)
+        self.model = model
+        self.row_ids = model.row_ids[rows]
+        self.columns = list(columns)
+        self.old_values = model.cells(rows, columns)
+        self.new_values = values
+
+    def redo(self):
+        self.model.set_cells(
+            self.model.rows_of(self.row_ids).tolist(), self.columns, self.new_values
+        )
+
+    def undo(self):
+        self.model.set_cells(
+            self.model.rows_of(self.row_ids).tolist(), self.columns, self.old_values
+        )
+
+
+class InsertRowsCommand(QUndoCommand):
+    """New rows, they keep the same row ids every time they are redone"""
+
+    def __init__(self, model, rows: pd.DataFrame, text: str = ""):
+        super().__init__(text)
+        self.model = model
+        self.rows = rows
+        self.row_ids = model.new_row_ids(rows.shape[0])
+
+    def redo(self):
+        self.model.addRow(self.rows, row_ids=self.row_ids)
+
+    def undo(self):
+        self.model.remove_rows(self.model.rows_of(self.row_ids))
+
+
+class RemoveRowsCommand(QUndoCommand):
+    """Rows removed from the sheet, put back with their row ids on undo"""
+
+    def __init__(self, model, rows: list, text: str = ""):
+        super().__init__(text)
+        self.model = model
+        self.row_ids = model.row_ids[sorted(set(rows))]
+        # the removed rows, in the order of self.row_ids
+        self.rows = None
+
+    def redo(self):
+        rows = self.model.rows_of(self.row_ids)
+        order = np.argsort(rows)
+        self.row_ids = self.row_ids[order]
+        self.rows = self.model.remove_rows(rows[order])
+
+    def undo(self):
+        self.model.insert_rows(self.rows, row_ids=self.row_ids)
+
+
+class RemoveSamplesCommand(QUndoCommand):
+    """
+    Rows moved from the sheet to the removed samples, which can restore them.
+    The rows stay in the model with a tombstone, removing only flips it.
+    """
+
+    def __init__(self, model, rows: list, removed_list, text: str = "Remove samples"):
+        super().__init__(text)
+        self.model = model
+        self.removed_list = removed_list
+        self.row_ids = model.row_ids[sorted(set(rows))]
+
+    def redo(self):
+        sample_ids = self.model.removed_samples(self.row_ids)["sample_id"]
+        self.model.remove_samples(self.row_ids)
+        self.removed_list.add_samples(self.row_ids, sample_ids)
+
+    def undo(self):
+        self.removed_list.take_samples(self.row_ids)
+        self.model.restore_samples(self.row_ids)
+
+
+class RestoreSamplesCommand(QUndoCommand):
+    """A removed sample put back into the sheet, at the place it was removed from"""
+
+    def __init__(self, model, row_id: int, removed_list, text: str = "Restore sample"):
+        super().__init__(text)
+        self.model = model
+        self.removed_list = removed_list
+        self.row_ids = np.array([row_id], dtype=np.int64)
+        # the place of the sample in the removed samples
+        self.index = None
+
+    def redo(self):
+        self.index = self.removed_list.take_samples(self.row_ids)
+        self.model.restore_samples(self.row_ids)
+
+    def undo(self):
+        sample_ids = self.model.removed_samples(self.row_ids)["sample_id"]
+        self.model.remove_samples(self.row_ids)
+        self.removed_list.add_samples(self.row_ids, sample_ids, self.index)
+
+
+class ControlsCommand(QUndoCommand):
+    """
+    Controls of a kind added or removed with a spin box. Changes of the same
+    kind and spin box gesture merge, so holding the spin arrow is one step.
+    """
+
+    def __init__(
+        self, model, name: str, gesture: int, command: QUndoCommand, text: str = ""
+    ):
+        super().__init__(text)
+        self.model = model
+        self.name = name
+        self.gesture = gesture
+        self.commands = [command]
+
+    def id(self):
+        return CONTROLS_COMMAND_ID
+
+    def mergeWith(self, other):
+        if other.name != self.name or other.gesture != self.gesture:
+            return False
+        self.commands.extend(other.commands)
+        self.setText(other.text())
+        return True
+
+    def redo(self):
+        # a single change is one row notification, a merged one a single reset
+        with self._batch():
+            for command in self.commands:
+                command.redo()
+
+    def undo(self):
+        with self._batch():
+            for command in reversed(self.commands):
+                command.undo()
+
+    def _batch(self):
+        if len(self.commands) > 1:
+            return self.model.batch()
+        return nullcontext()
+
+
+class TakeBarcodesCommand(QUndoCommand):
+    """
+    Barcodes allocated from the barcode pool, and the barcodes they replaced in
+    the sheet released. Undo gives them back at their place in the lists.
+    """
+
+    def __init__(self, mainwindow, taken: list, released: list = (), text: str = ""):
+        super().__init__(text)
+        self.mainwindow = mainwindow
+        self.taken = list(taken)
+        self.released = list(released)
+
+    def redo(self):
+        self._swap(self.released, self.taken)
+
+    def undo(self):
+        self._swap(self.taken, self.released)
+
+    def _swap(self, release: list, allocate: list) -> None:
+        # the tab updates the pool and the barcode lists
+        self.mainwindow.tabWidget.release_barcodes(release)
+        self.mainwindow.tabWidget.allocate_barcodes(allocate)
+
+
+class BatchCommand(QUndoCommand):
+    """
+    Several commands done and undone as one step, inside one model batch so the
+    views are notified once
+    """
+
+    def __init__(self, model, commands: list, text: str = ""):
+        super().__init__(text)
+        self.model = model
+        self.commands = commands
+
+    def redo(self):
+        with self.model.batch():
+            for command in self.commands:
+                command.redo()
+
+    def undo(self):
+        with self.model.batch():
+            for command in reversed(self.commands):
+                command.undo()
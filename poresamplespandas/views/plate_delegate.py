@@ -0,0 +1,34 @@
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QPalette
+from PySide6.QtWidgets import QStyle, QStyledItemDelegate
+
+
+class PlateDelegate(QStyledItemDelegate):
+    """
+    Paints a well of the plate view as its cached background brush with the
+    elided sample id on top, without going through the full item style
+    """
+
+    def paint(self, painter, option, index):
+        selected = option.state & QStyle.State_Selected
+        brush = index.data(Qt.BackgroundRole)
+        if selected:
+            painter.fillRect(option.rect, option.palette.highlight())
+        elif brush is not None:
+            painter.fillRect(option.rect, brush)
+
+        text = index.data(Qt.DisplayRole)
+        if text:
+            rect = option.rect.adjusted(2, 0, -2, 0)
+            painter.save()
+            painter.setPen(
+                option.palette.color(
+                    QPalette.HighlightedText if selected else QPalette.Text
+                )
+            )
+            painter.drawText(
+                rect,
+                Qt.AlignVCenter | Qt.AlignLeft,
+                option.fontMetrics.elidedText(text, Qt.ElideRight, rect.width()),
+            )
+            painter.restore()
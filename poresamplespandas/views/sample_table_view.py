@@ -7,7 +7,6 @@ from PySide6.QtWidgets import (
     QTableWidgetItem,
     QTableWidget,
     QMenu,
-    QComboBox,
     QLabel,
     QListWidget,
     QAbstractItemView,
@@ -26,9 +25,16 @@ from PySide6 import QtCore, QtGui, QtWidgets
 from PySide6.QtGui import QAction
 
 import sys
-import yaml
 from pathlib import Path
 
+from ..tracing.spans import span, traced
+from ..undo.commands import (
+    BatchCommand,
+    EditCellsCommand,
+    RemoveSamplesCommand,
+    TakeBarcodesCommand,
+)
+
 
 class SampleTableView(QTableView):
     """Class for The View of the sample sheet"""
@@ -45,40 +51,23 @@ class SampleTableView(QTableView):
         self.setDropIndicatorShown(True)
         self.setAcceptDrops(True)
 
+    def paintEvent(self, event):
+        # with tracing on, every repaint is a span with its number of data() calls
+        with span("repaint", counters=("data",)):
+            super(SampleTableView, self).paintEvent(event)
+
     def remove_and_store(self):
         """Removes highlighted rows from the view and stores them in the list of removed rows"""
         indexes = self.selectionModel().selectedRows()
-        index_slice = (
-            slice(indexes[0].row(), indexes[-1].row() + 1)
-            if len(indexes) > 1
-            else slice(indexes[0].row(), indexes[0].row() + 1)
-        )
-        rows_to_remove = self.model()._data.index[index_slice]
+        rows_to_remove = list(range(indexes[0].row(), indexes[-1].row() + 1))
 
-        # save the rows about to be removed
-        self.model().removed_samples_df = (
-            self.model()
-            .removed_samples_df.pipe(
-                lambda x: pd.concat([x, self.model()._data.iloc[rows_to_remove]])
+        # take the rows out of the view and add them to the removed list
+        self.main_window.undo_stack.push(
+            RemoveSamplesCommand(
+                self.model(), rows_to_remove, self.main_window.removed_samples
             )
-            .reset_index(drop=True)
         )
 
-        # drop the rows from the model._data
-        self.model()._data = (
-            self.model()._data.drop(rows_to_remove).reset_index(drop=True)
-        )
-
-        # update the model and the plate view
-        self.main_window.add_data_to_plate_widget()
-
-        # add to the removed list
-        self.main_window.add_removed_samples()
-
-        # update the color for POS and NEG
-        self.model().update_color_list()
-        self.model().layoutChanged.emit()
-
         # remove the selected rows
         self.clearSelection()
 
@@ -101,84 +90,54 @@ class SampleTableView(QTableView):
             e.ignore()
 
     # dropping barcodes
+    @traced
     def dropEvent(self, e):
-        # following adds to the index depending on where in the order the QListWidget is.
-        # otherwise, everything starts from index 0 and the same barcode is always removed
-        # from the barcodes_df
-        # TODO CHANGE ALL OF THIS AND MAKE 2 DATAFRAMES INSTEAD!!
-        current_df = e.source().objectName()
-        first_df = self.main_window.barcode_df.kit.unique()[0]
-        shape = self.main_window.barcode_df.loc[lambda x: x.kit == first_df].shape[0]
-        add_to_index = dict(
-            zip(
-                self.main_window.tabWidget.barcode_lists.keys(),
-                [0, shape],
-            )
+        # every list item carries the id of its barcode in the barcode pool
+        pool = self.main_window.barcode_pool
+        barcode_ids = sorted(
+            index.data(Qt.UserRole)
+            for index in e.source().selectionModel().selectedRows()
         )
-        add = add_to_index[current_df]
-
-        indexes = e.source().selectionModel().selectedRows()
-        index_slice = (
-            slice(indexes[0].row() + add, indexes[-1].row() + add)
-            if len(indexes) > 1
-            else slice(indexes[0].row() + add, indexes[0].row() + add)
-        )
-
-        # to undo adding of the barcodes
-        self.last_state()
-
-        chosen_barcodes = self.main_window.barcode_df.loc[index_slice, "name"].to_list()
-        chosen_kit = self.main_window.barcode_df.loc[index_slice, "kit"].to_list()
+        chosen_barcodes = [pool.name(barcode_id) for barcode_id in barcode_ids]
+        chosen_kit = [pool.kit(barcode_id) for barcode_id in barcode_ids]
 
-        # row to start insert of the model
+        # row to start insert of the model, nothing happens below the last row
         to_index = self.indexAt(e.pos())
+        if not to_index.isValid() or not barcode_ids:
+            e.ignore()
+            return
         model_row = to_index.row()
 
-        # how many rows down
-        number_of_rows = len(indexes) - 1 if len(indexes) > 1 else 0
-        rows_to_add = slice(model_row, (model_row + number_of_rows))
+        # how many rows down, a drop that does not fit above the last row is rejected
+        rows_to_add = list(range(model_row, model_row + len(chosen_barcodes)))
+        if rows_to_add[-1] >= self.model().live_count():
+            e.ignore()
+            self.main_window.statusbar.showMessage(
+                f"{len(chosen_barcodes)} barcodes do not fit below row "
+                f"{model_row + 1}",
+                5000,
+            )
+            return
+
+        # barcodes already in those rows go back to the pool
+        kits, names = self.model().cells(rows_to_add, ["kit", "barcodes"]).T
+        replaced = pool.allocated_ids(kits, names)
 
-        # add barcodes and kit to the model
+        # write the barcodes and kit into the rows and take them from the barcode
+        # pool, as one undoable step
         # TODO add where the barcodes should go, i.e. barcode1 or barcode2
-        self.model()._data.loc[rows_to_add, "barcodes"] = chosen_barcodes
-        self.model()._data.loc[rows_to_add, "kit"] = chosen_kit
-
-        # remove barcodes from barcodes df
-        index_slice_drop = (
-            slice(indexes[0].row() + add, indexes[-1].row() + 1 + add)
-            if len(indexes) > 1
-            else slice(indexes[0].row() + add, indexes[0].row() + 1 + add)
+        self.main_window.undo_stack.push(
+            BatchCommand(
+                self.model(),
+                [
+                    EditCellsCommand(
+                        self.model(),
+                        rows_to_add,
+                        ["barcodes", "kit"],
+                        list(zip(chosen_barcodes, chosen_kit)),
+                    ),
+                    TakeBarcodesCommand(self.main_window, barcode_ids, replaced),
+                ],
+                "Add barcodes",
+            )
         )
-
-        rows_to_remove = self.main_window.barcode_df.index[index_slice_drop]
-
-        self.main_window.barcode_df = self.main_window.barcode_df.drop(
-            rows_to_remove
-        ).reset_index(drop=True)
-
-        # update the barcode list
-        self.main_window.tabWidget.update_barcodes()
-
-        # update the data
-        self.model().dataChanged.emit(QtCore.QModelIndex(), QtCore.QModelIndex())
-        self.model().layoutChanged.emit()
-
-
-    def undo_barcodes(self):
-        # change back the data and the barcodes
-        self.model()._data = self.data_before
-        self.main_window.barcode_df = self.barcodes_before
-
-        # update the barcode list
-        self.main_window.tabWidget.update_barcodes()
-
-        # update the data
-        self.model().update_color_list()
-        self.model().dataChanged.emit(QtCore.QModelIndex(), QtCore.QModelIndex())
-        self.model().layoutChanged.emit()
-        self.main_window.add_data_to_plate_widget()
-
-    def last_state(self):
-        # to undo adding of the barcodes
-        self.barcodes_before = self.main_window.barcode_df.copy()
-        self.data_before = self.model()._data.copy()
@@ -0,0 +1,31 @@
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import QSpinBox
+
+# keys that step the value while they are held down
+STEP_KEYS = (Qt.Key_Up, Qt.Key_Down, Qt.Key_PageUp, Qt.Key_PageDown)
+
+
+class ControlSpinBox(QSpinBox):
+    """
+    Spin box of the number of controls of a kind. gesture numbers the gestures
+    that change the value, it moves on when a held arrow is let go, of the box
+    or the keyboard, and when editing finishes, so every change of one gesture
+    has the same number.
+    """
+
+    def __init__(self, parent=None):
+        super(ControlSpinBox, self).__init__(parent)
+        self.gesture = 0
+        self.editingFinished.connect(self.end_gesture)
+
+    def end_gesture(self) -> None:
+        self.gesture += 1
+
+    def mouseReleaseEvent(self, e):
+        super(ControlSpinBox, self).mouseReleaseEvent(e)
+        self.end_gesture()
+
+    def keyReleaseEvent(self, e):
+        super(ControlSpinBox, self).keyReleaseEvent(e)
+        if e.key() in STEP_KEYS and not e.isAutoRepeat():
+            self.end_gesture()
@@ -19,14 +19,12 @@ from PySide6.QtGui import Qt
 
 from PySide6.QtCore import QAbstractTableModel
 
-import qtawesome as qta
-
 
 class DataWidget(QWidget):
     def __init__(
         self,
         sample_table_view: QTableView,
-        table_widget: QTableWidget,
+        plate_view: QTableView,
         mainwindow: QMainWindow,
         name_of_file: str = None,
     ) -> None:
@@ -75,7 +73,7 @@ class DataWidget(QWidget):
         # add the name of the file
         tvbox.addWidget(QLabel("Currently working on file:"))
         tvbox.addWidget(self.filename)
-        tvbox.addWidget(table_widget)
+        tvbox.addWidget(plate_view)
         top_widget.setLayout(tvbox)
         # size of the plate view
         top_widget.setMaximumHeight(350)
@@ -0,0 +1,12 @@
+from PySide6.QtGui import QIcon
+
+
+def icon(*names, **options) -> QIcon:
+    """
+    qtawesome.icon, with qtawesome imported on the first call. Importing it
+    pulls in qtpy and more Qt modules than the window needs, and the first
+    icon loads every icon font, so icons are set after the window is up.
+    """
+    import qtawesome
+
+    return qtawesome.icon(*names, **options)
@@ -0,0 +1,28 @@
+from PySide6.QtWidgets import QComboBox
+
+
+class RemovedSamplesBox(QComboBox):
+    """
+    The removed samples, shown by sample id. Every item holds the row id of its
+    sample in the model, items are added and taken one by one so the list is
+    never rebuilt.
+    """
+
+    def add_samples(self, row_ids, sample_ids, index: int = None) -> None:
+        """Add samples at index, or after the last item"""
+        if index is None:
+            index = self.count()
+        for offset, (row_id, sample_id) in enumerate(zip(row_ids, sample_ids)):
+            self.insertItem(index + offset, str(sample_id), int(row_id))
+
+    def take_samples(self, row_ids) -> int:
+        """Take the samples out of the list, returns the index of the first one"""
+        indexes = [self.findData(int(row_id)) for row_id in row_ids]
+        for index in sorted(indexes, reverse=True):
+            if index >= 0:
+                self.removeItem(index)
+        return min(indexes, default=-1)
+
+    def row_id(self, index: int) -> int:
+        """Row id of the sample at index"""
+        return self.itemData(index)
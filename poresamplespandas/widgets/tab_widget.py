@@ -15,14 +15,23 @@ from PySide6.QtWidgets import (
     QSizePolicy,
     QAbstractItemView,
     QMainWindow,
+    QCheckBox,
+    QListView,
+    QSpinBox,
 )
-from PySide6.QtCore import Qt
-import qtawesome as qta
+from PySide6.QtCore import Qt, QTimer, Signal
 
-from ..import_data.import_barcodes import make_barcodes_df2
+from ..barcodes.barcode_distance import MIN_HAMMING_DISTANCE
+from ..enums.enums import ControlPlacement
+from ..export.writers import WRITERS
+from ..models.barcode_list_model import BarcodeListModel
+from .icons import icon
 
 
 class TabMenu(QTabWidget):
+    # name of a tab that has just been built
+    tab_created = Signal(str)
+
     def __init__(self, mainwindow: QMainWindow):
         super(TabMenu, self).__init__()
 
@@ -46,13 +55,32 @@ class TabMenu(QTabWidget):
         self.tabs = {}
         self.barcode_buttons = {}
         self.barcode_lists = {}
+        self.barcode_models = {}
+
+        # the tabs are built when first opened, or by build_tabs_later
+        self.tab_builders = {
+            "file": self.mk_file_tab,
+            "barcode": self.mk_barcode_tab,
+            "help": self.mk_help_tab,
+        }
 
-        # create the tabs
-        self.mk_file_tab()
-        self.mk_barcode_tab()
-        self.mk_help_tab()
+    def ensure_tab(self, name: str) -> QWidget:
+        """Return a tab, it is built first if it has not been"""
+        if name not in self.tabs:
+            self.tab_builders[name]()
+            self.tab_created.emit(name)
+        return self.tabs[name]
+
+    def build_tabs_later(self) -> None:
+        """Build the tabs that are not built yet, one per pass of the event loop"""
+        for name in self.tab_builders:
+            if name not in self.tabs:
+                self.ensure_tab(name)
+                QTimer.singleShot(0, self.build_tabs_later)
+                return
 
     def open_tab(self, input_):
+        self.ensure_tab(input_)
         if self.currentWidget() == self.tabs[input_]:
             self.toggle_visibility()
         else:
@@ -71,16 +99,16 @@ class TabMenu(QTabWidget):
         layout = QVBoxLayout()
         layout.setAlignment(Qt.AlignTop)
 
-        # change this
-        barcodes = self.main_window.barcode_df
-        for bc in barcodes.kit.unique():
-            barcode_df = barcodes.loc[lambda x: x.kit == bc]
-
+        for bc in self.main_window.barcode_pool.kits:
             self.barcode_buttons[bc] = QPushButton(bc)
             self.barcode_buttons[bc].setObjectName(bc)
             self.barcode_buttons[bc].clicked.connect(self.toggle_barcode_visibility)
 
-            self.barcode_lists[bc] = QListWidget()
+            self.barcode_models[bc] = BarcodeListModel(
+                self.main_window.barcode_pool, bc, self
+            )
+            self.barcode_lists[bc] = QListView()
+            self.barcode_lists[bc].setModel(self.barcode_models[bc])
             self.barcode_lists[bc].setObjectName(bc)
             self.barcode_lists[bc].setSizePolicy(
                 QSizePolicy.Expanding, QSizePolicy.Expanding
@@ -93,21 +121,65 @@ class TabMenu(QTabWidget):
             layout.addWidget(self.barcode_buttons[bc])
             layout.addWidget(self.barcode_lists[bc])
 
+        # barcodes for every sample that has none, from one kit
+        self.assign_kit = QComboBox()
+        self.assign_kit.addItems(self.main_window.barcode_pool.kits)
+        self.control_placement = QComboBox()
+        for placement in ControlPlacement:
+            self.control_placement.addItem(placement.value, placement)
+        self.button_assign_all = QPushButton("Assign all")
+        self.button_assign_all.setStatusTip(
+            "Give every sample without a barcode the next free barcode of the kit"
+        )
+        layout.addWidget(QLabel("Assign all from kit: "))
+        layout.addWidget(self.assign_kit)
+        layout.addWidget(QLabel("Controls: "))
+        layout.addWidget(self.control_placement)
+        layout.addWidget(self.button_assign_all)
+
+        # assigned barcodes that are too alike to demultiplex
+        self.min_distance = QSpinBox()
+        self.min_distance.setRange(1, 99)
+        self.min_distance.setValue(MIN_HAMMING_DISTANCE)
+        self.min_distance.setStatusTip("Smallest Hamming distance between barcodes")
+        self.button_check_distances = QPushButton("Check barcode distances")
+        self.button_check_distances.setStatusTip(
+            "Find assigned barcodes that differ in too few positions"
+        )
+        layout.addWidget(QLabel("Min. distance: "))
+        layout.addWidget(self.min_distance)
+        layout.addWidget(self.button_check_distances)
+
         # add layout
         tab.setLayout(layout)
         self.tabs["barcode"] = tab
         self.addTab(tab, "barcode")
 
-        # clear the barcode_lists
-        self.update_barcodes()
-
     def update_barcodes(self):
-        barcodes = self.main_window.barcode_df
-        for bc in barcodes.kit.unique():
-            self.barcode_lists[bc].clear()
-            barcode_df = barcodes.loc[lambda x: x.kit == bc]
-            # add items
-            self.barcode_lists[bc].addItems(barcode_df.name.to_list())
+        """Show the barcode pool of the main window, e.g. after it was reloaded"""
+        for kit, model in self.barcode_models.items():
+            model.set_pool(self.main_window.barcode_pool)
+            if self.barcode_lists[kit].isVisible():
+                self.load_kit(kit)
+
+    def load_kit(self, kit: str) -> None:
+        """Read the barcodes of a kit into the pool, they are inserted into its list"""
+        self.ensure_tab("barcode")
+        self.barcode_models[kit].load()
+
+    def allocate_barcodes(self, barcode_ids) -> None:
+        """Allocate barcodes in the pool, each one is removed from its list"""
+        self.ensure_tab("barcode")
+        pool = self.main_window.barcode_pool
+        for barcode_id in barcode_ids:
+            self.barcode_models[pool.kit(barcode_id)].allocate(barcode_id)
+
+    def release_barcodes(self, barcode_ids) -> None:
+        """Release barcodes in the pool, each one goes back to its place in the list"""
+        self.ensure_tab("barcode")
+        pool = self.main_window.barcode_pool
+        for barcode_id in barcode_ids:
+            self.barcode_models[pool.kit(barcode_id)].release(barcode_id)
 
     def mk_file_tab(self):
         tab = QWidget()
@@ -116,23 +188,42 @@ class TabMenu(QTabWidget):
 
         self.button_import = QPushButton("Import samples")
         self.button_import.setStatusTip("Import samples")
-        self.button_import.setIcon(qta.icon("fa5s.file-import", color="white"))
+        self.button_import.setIcon(icon("fa5s.file-import", color="white"))
         self.button_import.setStyleSheet("QPushButton { text-align: left; }")
 
         self.button_export = QPushButton("Export sheet")
         self.button_export.setStatusTip("Export samplesheet")
-        self.button_export.setIcon(qta.icon("fa5s.file-export", color="white"))
+        self.button_export.setIcon(icon("fa5s.file-export", color="white"))
         self.button_export.setStyleSheet("QPushButton { text-align: left; }")
 
+        # the files written by an export
+        self.export_formats = {}
+        for name, writer in WRITERS.items():
+            self.export_formats[name] = QCheckBox(writer.description)
+            self.export_formats[name].setChecked(writer.available)
+            self.export_formats[name].setEnabled(writer.available)
+            self.export_formats[name].setStatusTip(f"Export writes *{writer.suffix}")
+
         self.file_type = QComboBox()
         # change this to real values
         self.file_type.addItems(["analytix", "dummy1", "dummy2"])
 
+        # parsed imports are cached, a file opened again is not parsed again
+        self.use_import_cache = QCheckBox("Use import cache")
+        self.use_import_cache.setChecked(True)
+        self.use_import_cache.setStatusTip("Load files opened before from the cache")
+        self.button_clear_cache = QPushButton("Clear import cache")
+        self.button_clear_cache.setStatusTip("Remove all cached imports")
+
         # add to layout:
         layout.addWidget(self.button_import)
         layout.addWidget(self.button_export)
+        for checkbox in self.export_formats.values():
+            layout.addWidget(checkbox)
         layout.addWidget(QLabel("Origin of file to import: "))
         layout.addWidget(self.file_type)
+        layout.addWidget(self.use_import_cache)
+        layout.addWidget(self.button_clear_cache)
         layout.addSpacerItem(self.vs)
         tab.setLayout(layout)
 
@@ -170,4 +261,5 @@ Regret barcode: Ctrl-Z \n
         if self.barcode_lists[name].isVisible():
             self.barcode_lists[name].hide()
         else:
+            self.load_kit(name)
             self.barcode_lists[name].show()
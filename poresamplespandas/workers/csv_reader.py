@@ -0,0 +1,41 @@
+from PySide6.QtCore import Signal
+
+from .worker import Worker, WorkerSignals
+
+
+class CsvReaderSignals(WorkerSignals):
+    chunk_read = Signal(object)
+
+
+class CsvChunkReader(Worker):
+    """
+    Keeps reading the rest of a chunked pd.read_csv on a worker thread and hands
+    every chunk to the GUI thread with the chunk_read signal. prepare is called
+    on every chunk on the worker thread, e.g. to sort it, and what it returns is
+    emitted. Every chunk is twice as large as the one before, up to max_chunk
+    rows, so merging them into the rows read so far takes linear time in total.
+    """
+
+    signals_class = CsvReaderSignals
+
+    def __init__(self, chunks, prepare=None, max_chunk: int = None):
+        super(CsvChunkReader, self).__init__()
+        self.chunks = chunks
+        self.prepare = prepare
+        self.max_chunk = max_chunk or chunks.chunksize
+
+    def work(self) -> None:
+        size = self.chunks.chunksize
+        try:
+            # cancel stops reading after the current chunk
+            while not self._cancelled:
+                try:
+                    chunk = self.chunks.get_chunk(size)
+                except StopIteration:
+                    break
+                if self.prepare is not None:
+                    chunk = self.prepare(chunk)
+                self.signals.chunk_read.emit(chunk)
+                size = min(size * 2, self.max_chunk)
+        finally:
+            self.chunks.close()
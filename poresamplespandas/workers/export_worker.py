@@ -0,0 +1,31 @@
+from PySide6.QtCore import Signal
+
+from ..export.writers import write_export
+from .worker import Worker, WorkerSignals
+
+
+class ExportWorkerSignals(WorkerSignals):
+    # path of the written file
+    written = Signal(str)
+
+
+class ExportWorker(Worker):
+    """
+    Writes one export file on a worker thread. The writers of one export
+    share the projection, the first worker to need it builds it.
+    """
+
+    signals_class = ExportWorkerSignals
+
+    def __init__(self, writer, projection, path):
+        super(ExportWorker, self).__init__()
+        self.writer = writer
+        self.projection = projection
+        self.path = path
+
+    def error_message(self, error: Exception) -> str:
+        return f"{self.path.name}: {error}"
+
+    def work(self) -> None:
+        path = write_export(self.writer, self.projection, self.path)
+        self.signals.written.emit(str(path))
@@ -0,0 +1,53 @@
+from PySide6.QtCore import QCoreApplication, QObject, Signal
+
+from .worker import Worker, WorkerSignals
+
+
+class ImportCancelled(Exception):
+    """Raised inside the importer when the import has been cancelled"""
+
+
+class ImportWorkerSignals(WorkerSignals):
+    # bytes parsed and size of the file
+    progress = Signal(int, int)
+    result = Signal(object)
+    cancelled = Signal()
+
+
+class ImportWorker(Worker):
+    """
+    Runs an importer on a worker thread. The importer is called as
+    importer(input_file, progress=callback) and calls back after every chunk,
+    which is where a cancelled import stops, no result is emitted then. build
+    is called on the dataframe on the worker thread as well, e.g. to build the
+    model from it. The result is handed to the GUI thread with the result
+    signal.
+    """
+
+    signals_class = ImportWorkerSignals
+
+    def __init__(self, importer, input_file, build=None):
+        super(ImportWorker, self).__init__()
+        self.importer = importer
+        self.input_file = input_file
+        self.build = build
+
+    def report_progress(self, done: int, total: int) -> None:
+        if self._cancelled:
+            raise ImportCancelled()
+        self.signals.progress.emit(done, total)
+
+    def work(self) -> None:
+        try:
+            result = self.importer(self.input_file, progress=self.report_progress)
+            if self.build is not None:
+                result = self.build(result)
+            if self._cancelled:
+                raise ImportCancelled()
+        except ImportCancelled:
+            self.signals.cancelled.emit()
+            return
+        if isinstance(result, QObject):
+            # a QObject lives in the thread that made it, hand it over
+            result.moveToThread(QCoreApplication.instance().thread())
+        self.signals.result.emit(result)
@@ -0,0 +1,44 @@
+from PySide6.QtCore import QObject, QRunnable, Signal
+
+
+class WorkerSignals(QObject):
+    """Signals of every Worker, QRunnable can not define signals itself"""
+
+    error = Signal(str)
+    finished = Signal()
+
+
+class Worker(QRunnable):
+    """
+    Base of the workers run on the QThreadPool. A subclass implements work and
+    sets signals_class to a WorkerSignals subclass with the signals it emits
+    on top of error, which is emitted when work raises, and finished, which is
+    emitted when it returns either way.
+    """
+
+    signals_class = WorkerSignals
+
+    def __init__(self):
+        super(Worker, self).__init__()
+        # the object is owned by python, not deleted by the QThreadPool
+        self.setAutoDelete(False)
+        self.signals = self.signals_class()
+        self._cancelled = False
+
+    def cancel(self) -> None:
+        """Ask the worker to stop, work checks for it where it can stop"""
+        self._cancelled = True
+
+    def work(self) -> None:
+        raise NotImplementedError
+
+    def error_message(self, error: Exception) -> str:
+        return str(error)
+
+    def run(self) -> None:
+        try:
+            self.work()
+        except Exception as e:
+            self.signals.error.emit(self.error_message(e))
+        finally:
+            self.signals.finished.emit()
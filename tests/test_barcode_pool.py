@@ -0,0 +1,84 @@
+import random
+from pathlib import Path
+
+import pytest
+
+from poresamplespandas.barcodes.barcode_pool import BarcodePool
+from poresamplespandas.barcodes.kit_catalog import KitCatalog
+
+KIT_FILE = Path(__file__).parents[1] / "config" / "barcodes.yaml"
+KIT = "SQK-RBK110.96"
+OTHER_KIT = "SQK-RBK110.XX"
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = BarcodePool(KitCatalog(KIT_FILE, cache_dir=tmp_path))
+    pool.load_kit(KIT)
+    pool.load_kit(OTHER_KIT)
+    return pool
+
+
+def free_in_bitmap(pool, kit):
+    return [i for i in pool.kit_ids(kit) if pool.is_free(i)]
+
+
+def test_allocate_and_release_one(pool):
+    barcode_id = pool.id_of(KIT, "RB03")
+    pool.allocate([barcode_id])
+    assert not pool.is_free(barcode_id)
+    assert barcode_id not in pool.free_ids(KIT)
+    # an allocated barcode keeps the row it goes back to
+    assert pool.row_of(barcode_id) == 2
+    pool.release([barcode_id])
+    assert pool.is_free(barcode_id)
+    assert pool.free_ids(KIT) == list(pool.kit_ids(KIT))
+
+
+def test_free_lists_follow_the_bitmap(pool):
+    rng = random.Random(0)
+    used = set()
+    all_ids = list(pool.kit_ids(KIT)) + list(pool.kit_ids(OTHER_KIT))
+    for _ in range(200):
+        free = [i for i in all_ids if i not in used]
+        if used and rng.random() < 0.5:
+            released = rng.sample(sorted(used), rng.randint(1, min(5, len(used))))
+            pool.release(released)
+            used.difference_update(released)
+        elif free:
+            allocated = rng.sample(free, rng.randint(1, min(5, len(free))))
+            pool.allocate(allocated)
+            used.update(allocated)
+        for kit in (KIT, OTHER_KIT):
+            assert pool.free_ids(kit) == free_in_bitmap(pool, kit)
+            assert pool.free_ids(kit) == [i for i in pool.kit_ids(kit) if i not in used]
+
+
+def test_allocate_checks_the_barcodes(pool):
+    barcode_id = pool.id_of(KIT, "RB01")
+    with pytest.raises(ValueError):
+        pool.allocate([barcode_id, barcode_id])
+    pool.allocate([barcode_id])
+    with pytest.raises(ValueError):
+        pool.allocate([barcode_id])
+    with pytest.raises(ValueError):
+        pool.release([pool.id_of(KIT, "RB02")])
+    # a failed call changes nothing
+    assert pool.free_ids(KIT) == free_in_bitmap(pool, KIT)
+
+
+def test_allocated_ids(pool):
+    rb01, rb02 = pool.id_of(KIT, "RB01"), pool.id_of(KIT, "RB02")
+    other = pool.id_of(OTHER_KIT, "RB01")
+    pool.allocate([rb02, rb01, other])
+    kits = [KIT, " ", KIT, KIT, OTHER_KIT, KIT, "unknown"]
+    names = ["RB02", " ", "RB01", "RB05", "RB01", "RB02", "RB01"]
+    # free barcodes, empty cells and unknown kits are skipped, doubles kept once
+    assert pool.allocated_ids(kits, names) == [rb02, rb01, other]
+
+
+def test_reset(pool):
+    pool.allocate(list(pool.kit_ids(KIT))[:10])
+    pool.reset()
+    assert pool.free_ids(KIT) == list(pool.kit_ids(KIT))
+    assert free_in_bitmap(pool, KIT) == list(pool.kit_ids(KIT))
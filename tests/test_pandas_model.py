@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from poresamplespandas.core.sample_sheet import classify_samples, make_sort_keys
+from poresamplespandas.models.pandas_model import PandasModel
+
+
+def make_sheet(samples: int, seed: int) -> pd.DataFrame:
+    """Samples with repeated ids, so equal sort keys are merged too"""
+    rng = np.random.default_rng(seed)
+    sample_ids = [f"21COR{i:06d}" for i in rng.integers(0, samples // 2, samples)]
+    sample_ids[:2] = ["POS_CTRL1", "NEG_CTRL1"]
+    return pd.DataFrame(
+        {
+            "sample_id": sample_ids,
+            "order": [-1, 1] + [0] * (samples - 2),
+            "age": rng.integers(20, 90, samples).astype(float),
+            "barcodes": " ",
+            "kit": " ",
+            "comment": [f"row {i}" for i in range(samples)],
+        }
+    )
+
+
+def check_aligned(model: PandasModel) -> None:
+    """The per-row arrays belong to the rows of the frame they stand next to"""
+    frame = model._frame
+    assert model._sort_keys == make_sort_keys(frame, model.sortby)
+    assert model._sort_keys == sorted(model._sort_keys)
+    assert model._classes.tolist() == classify_samples(frame["sample_id"]).tolist()
+    for column, strings in model._display_cache.items():
+        assert strings.tolist() == frame.iloc[:, column].astype(str).tolist()
+    assert len(np.unique(model._ids)) == frame.shape[0] == len(model._removed)
+
+
+@pytest.mark.parametrize("chunks", [1, 3, 10])
+def test_append_rows_merges_like_a_sort(qapp, chunks):
+    sheet = make_sheet(600, seed=chunks)
+    first, rest = sheet.iloc[:100], sheet.iloc[100:]
+    model = PandasModel(first.reset_index(drop=True))
+    # cached display strings must be merged along with the rows
+    for column in range(sheet.shape[1]):
+        model._strings(column)
+    comments = {
+        row_id: comment
+        for row_id, comment in zip(model.row_ids, model._frame["comment"])
+    }
+    for chunk in np.array_split(rest, chunks):
+        rows, keys = model.sorted_rows(chunk)
+        model.append_rows(rows, keys)
+        check_aligned(model)
+
+    expected = PandasModel(sheet.copy())
+    pd.testing.assert_frame_equal(model._frame, expected._frame)
+    # row ids follow the rows they were given to
+    for row_id, comment in comments.items():
+        assert model._frame["comment"].iloc[model.rows_of([row_id])[0]] == comment
+
+
+def test_append_rows_keeps_removed_samples(qapp):
+    sheet = make_sheet(300, seed=1)
+    model = PandasModel(sheet.iloc[:150].reset_index(drop=True))
+    removed_ids = model.row_ids[[3, 40, 41, 90]].tolist()
+    removed = model._data.iloc[[3, 40, 41, 90]]["comment"].tolist()
+    model.remove_samples(removed_ids)
+
+    model.append_rows(sheet.iloc[150:])
+    check_aligned(model)
+    assert model.live_count() == 296
+    assert model.removed_samples(removed_ids)["comment"].tolist() == removed
+    assert not set(removed) & set(model._data["comment"])
+
+    model.restore_samples(removed_ids)
+    check_aligned(model)
+    pd.testing.assert_frame_equal(model._data, PandasModel(sheet.copy())._data)
+
+
+def test_append_rows_in_a_batch(qapp):
+    sheet = make_sheet(200, seed=2)
+    model = PandasModel(sheet.iloc[:50].reset_index(drop=True))
+    with model.batch():
+        model.append_rows(sheet.iloc[50:120])
+        model.append_rows(sheet.iloc[120:])
+    check_aligned(model)
+    pd.testing.assert_frame_equal(model._frame, PandasModel(sheet.copy())._frame)
+
+
+def test_append_rows_keeps_the_fetched_rows(qapp):
+    sheet = make_sheet(2000, seed=3)
+    model = PandasModel(sheet.iloc[:1000].reset_index(drop=True))
+    fetched = model.rowCount()
+    model.append_rows(sheet.iloc[1000:])
+    assert model.rowCount() == fetched
+    assert model.canFetchMore() is True
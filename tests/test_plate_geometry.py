@@ -0,0 +1,50 @@
+import pytest
+
+from poresamplespandas.plate.plate_geometry import PlateGeometry, row_name
+
+
+@pytest.mark.parametrize("wells", [96, 384, 1536])
+@pytest.mark.parametrize("column_major", [True, False])
+def test_position_inverts_coordinates(wells, column_major):
+    geometry = PlateGeometry.from_wells(wells, column_major=column_major)
+    for position in range(3 * geometry.wells_per_plate):
+        row, column, plate = geometry.coordinates(position)
+        assert 0 <= row < geometry.rows
+        assert 0 <= column < geometry.columns
+        assert geometry.position(row, column, plate) == position
+
+
+def test_fill_order():
+    assert PlateGeometry().well_name(1) == "B1"
+    assert PlateGeometry().well_name(8) == "A2"
+    assert PlateGeometry(column_major=False).well_name(1) == "A2"
+    assert PlateGeometry(column_major=False).well_name(12) == "B1"
+
+
+def test_labels_match_label():
+    geometry = PlateGeometry(rows=3, columns=4)
+    assert geometry.labels(30) == [geometry.label(p) for p in range(30)]
+    assert geometry.label(11) == "C4"
+    assert geometry.label(12) == "P2-A1"
+
+
+def test_positions_outside_the_plates():
+    geometry = PlateGeometry(plates=2)
+    with pytest.raises(IndexError):
+        geometry.coordinates(-1)
+    with pytest.raises(IndexError):
+        geometry.coordinates(2 * 96)
+    with pytest.raises(IndexError):
+        geometry.labels(2 * 96 + 1)
+    assert geometry.coordinates(2 * 96 - 1) == (7, 11, 1)
+
+
+def test_row_name():
+    assert [row_name(row) for row in (0, 25, 26, 27, 51, 52)] == [
+        "A",
+        "Z",
+        "AA",
+        "AB",
+        "AZ",
+        "BA",
+    ]
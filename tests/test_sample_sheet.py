@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+
+from poresamplespandas.core.sample_sheet import classify_samples, control_changes
+from poresamplespandas.enums.enums import SampleClass
+
+
+def changes(sample_ids, name, number):
+    sample_ids = np.array(sample_ids, dtype=object)
+    return control_changes(
+        classify_samples(pd.Series(sample_ids)), sample_ids, name, number
+    )
+
+
+def test_add_controls_to_a_sheet_without_any():
+    remove, controls = changes(["21COR1", "NEG_CTRL1"], "POS", 2)
+    assert len(remove) == 0
+    assert controls["sample_id"].tolist() == ["POS_CTRL1", "POS_CTRL2"]
+
+
+def test_added_controls_are_numbered_after_the_highest():
+    remove, controls = changes(["POS_CTRL1", "POS_CTRL3", "21COR1"], "POS", 4)
+    assert len(remove) == 0
+    assert controls["sample_id"].tolist() == ["POS_CTRL4", "POS_CTRL5"]
+
+
+def test_the_highest_numbered_controls_are_removed():
+    sample_ids = ["NEG_CTRL10", "21COR1", "NEG_CTRL2", "POS_CTRL1", "NEG_CTRL1"]
+    remove, controls = changes(sample_ids, "NEG", 1)
+    assert sorted(remove.tolist()) == [0, 2]
+    assert controls.shape[0] == 0
+    remove, _ = changes(sample_ids, "NEG", 0)
+    assert sorted(remove.tolist()) == [0, 2, 4]
+
+
+def test_same_number_changes_nothing():
+    remove, controls = changes(["POS_CTRL1", "POS_CTRL2"], "POS", 2)
+    assert len(remove) == 0
+    assert controls.shape[0] == 0
+
+
+def test_pos_marker_comes_first():
+    classes = classify_samples(pd.Series(["NEG_POS", "POS_NEG", "NEG1", "x", None]))
+    assert classes.tolist() == [
+        SampleClass.POS,
+        SampleClass.POS,
+        SampleClass.NEG,
+        SampleClass.SAMPLE,
+        SampleClass.SAMPLE,
+    ]